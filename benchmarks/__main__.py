@@ -0,0 +1,104 @@
+import argparse
+import json
+import platform
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+from .suites import DEFAULT_REPEAT, SUITES, Result, libsnappy
+
+
+# The columns of the printed tables: result key, header, width and format.
+COLUMNS = (
+    ("name", "name", 16, "<"),
+    ("impl", "impl", 14, "<"),
+    ("size", "size", 9, ">"),
+    ("ratio", "ratio", 7, ">.3f"),
+    ("compress_mb_s", "compress MB/s", 13, ">.2f"),
+    ("decompress_mb_s", "decompress MB/s", 15, ">.2f"),
+    ("crc32c_mb_s", "crc32c MB/s", 11, ">.2f"),
+    ("compress_peak_bytes", "compress peak", 13, ">"),
+    ("decompress_peak_bytes", "decompress peak", 15, ">"),
+)
+
+
+def format_header(keys: List[str]) -> str:
+    return "  ".join(
+        f"{header:{fmt[0]}{width}}"
+        for key, header, width, fmt in COLUMNS
+        if key in keys
+    )
+
+
+def format_row(result: Result, keys: List[str]) -> str:
+    return "  ".join(
+        f"{result[key]:{fmt[0]}{width}{fmt[1:]}}" if key in result else " " * width
+        for key, _, width, fmt in COLUMNS
+        if key in keys
+    )
+
+
+def metadata() -> Dict[str, Any]:
+    libsnappy_version = (
+        getattr(libsnappy, "__version__", "unknown") if libsnappy else None
+    )
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "python_snappy": libsnappy_version,
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmark py_snappy on the snappy test corpus, against "
+        "python-snappy when it is installed.",
+    )
+    parser.add_argument(
+        "suites",
+        nargs="*",
+        metavar="suite",
+        help=f"one of {', '.join(SUITES)} (default: all)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=DEFAULT_REPEAT,
+        help="timing rounds per measurement, of which the best is kept",
+    )
+    parser.add_argument(
+        "--max-size",
+        type=int,
+        help="truncate inputs to this many bytes for quicker runs",
+    )
+    parser.add_argument(
+        "--output", "-o", help="also write the results as JSON to this file"
+    )
+    args = parser.parse_args(argv)
+
+    for suite in args.suites:
+        if suite not in SUITES:
+            parser.error(f"unknown suite {suite!r}")
+
+    results: List[Result] = []
+    for suite in args.suites or SUITES:
+        print(f"\n== {suite} ==")
+        keys: List[str] = []
+        for result in SUITES[suite](args.repeat, args.max_size):
+            if not keys:
+                keys = list(result)
+                print(format_header(keys))
+            print(format_row(result, keys), flush=True)
+            results.append(result)
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"metadata": metadata(), "results": results}, output, indent=2)
+            output.write("\n")
+        print(f"\nWrote {len(results)} results to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
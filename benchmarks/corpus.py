@@ -0,0 +1,52 @@
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+FIXTURES_DIR = Path(__file__).resolve().parent.parent / "tests" / "fixtures"
+
+# The standard snappy benchmark corpus, as used by the reference
+# implementation's own benchmarks.
+FIXTURES = (
+    "alice29.txt",
+    "asyoulik.txt",
+    "fireworks.jpeg",
+    "geo.protodata",
+    "html",
+    "html_x_4",
+    "kppkn.gtb",
+    "lcet10.txt",
+    "paper-100k.pdf",
+    "plrabn12.txt",
+    "urls.10K",
+)
+
+# Inputs cut from the concatenated corpus, for the per-message costs that
+# dominate small payloads and the per-byte costs that dominate large ones.
+SIZE_CLASSES = (
+    ("64B", 64),
+    ("1KiB", 1 << 10),
+    ("16KiB", 1 << 14),
+    ("256KiB", 1 << 18),
+    ("1MiB", 1 << 20),
+)
+
+
+def load_fixture(name: str) -> bytes:
+    return (FIXTURES_DIR / name).read_bytes()
+
+
+def load_fixtures(names: Tuple[str, ...] = FIXTURES) -> Dict[str, bytes]:
+    return {name: load_fixture(name) for name in names}
+
+
+def size_class_inputs() -> List[Tuple[str, bytes]]:
+    """
+    Return an input of each size class, cut from the start of the corpus
+    with the incompressible fixtures left out.
+    """
+    corpus = b"".join(
+        load_fixture(name)
+        for name in FIXTURES
+        if name not in ("fireworks.jpeg", "paper-100k.pdf")
+    )
+    return [(label, corpus[:size]) for label, size in SIZE_CLASSES]
@@ -0,0 +1,202 @@
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import py_snappy
+from py_snappy.crc32c import crc32c
+from py_snappy.framing import StreamCompressor, StreamDecompressor
+from py_snappy.main import MAX_COPY2_OFFSET, MAX_LEVEL, MIN_LEVEL
+
+from .corpus import load_fixtures, size_class_inputs
+
+try:
+    import snappy as libsnappy
+except ImportError:
+    libsnappy = None
+
+
+Result = Dict[str, Any]
+
+# Each timing is the best of this many rounds, each running the function
+# often enough to take at least MIN_ROUND_TIME seconds.
+DEFAULT_REPEAT = 3
+MIN_ROUND_TIME = 0.1
+
+# The fixtures the slower suites run on, and how much of each they use.
+LEVEL_FIXTURES = ("alice29.txt", "html_x_4", "kppkn.gtb", "fireworks.jpeg")
+LEVEL_INPUT_SIZE = 1 << 16
+
+
+def best_time(fn: Callable[[], Any], repeat: int) -> float:
+    """
+    Return the shortest time taken by a call to fn, in seconds.
+    """
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= MIN_ROUND_TIME:
+            break
+        calls *= 2
+
+    best = elapsed / calls
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best
+
+
+def peak_memory(fn: Callable[[], Any]) -> int:
+    """
+    Return the peak number of bytes allocated through Python during a call to
+    fn. Memory allocated by C extensions outside of Python's allocator is not
+    seen, so this is only reported for py_snappy.
+    """
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def throughput(size: int, seconds: float) -> float:
+    return size / seconds / 1e6 if seconds else float("inf")
+
+
+def measure_block(
+    suite: str,
+    name: str,
+    data: bytes,
+    repeat: int,
+    compress: Callable[[bytes], bytes] = py_snappy.compress,
+    impl: str = "py_snappy",
+) -> Iterator[Result]:
+    """
+    Yield the compress and decompress results for data, for py_snappy and,
+    when it is installed, for python-snappy.
+    """
+    compressed = compress(data)
+    assert py_snappy.decompress(compressed) == data
+    yield {
+        "suite": suite,
+        "name": name,
+        "impl": impl,
+        "size": len(data),
+        "ratio": len(compressed) / len(data) if data else 1.0,
+        "compress_mb_s": throughput(
+            len(data), best_time(lambda: compress(data), repeat)
+        ),
+        "decompress_mb_s": throughput(
+            len(data), best_time(lambda: py_snappy.decompress(compressed), repeat)
+        ),
+        "compress_peak_bytes": peak_memory(lambda: compress(data)),
+        "decompress_peak_bytes": peak_memory(lambda: py_snappy.decompress(compressed)),
+    }
+
+    if libsnappy is not None and impl == "py_snappy":
+        lib_compressed = libsnappy.compress(data)
+        yield {
+            "suite": suite,
+            "name": name,
+            "impl": "python-snappy",
+            "size": len(data),
+            "ratio": len(lib_compressed) / len(data) if data else 1.0,
+            "compress_mb_s": throughput(
+                len(data), best_time(lambda: libsnappy.compress(data), repeat)
+            ),
+            "decompress_mb_s": throughput(
+                len(data),
+                best_time(lambda: libsnappy.decompress(lib_compressed), repeat),
+            ),
+        }
+
+
+def corpus_suite(repeat: int, max_size: Optional[int]) -> Iterator[Result]:
+    """
+    Raw block compression and decompression of each fixture of the corpus.
+    """
+    for name, data in load_fixtures().items():
+        yield from measure_block("corpus", name, data[:max_size], repeat)
+
+
+def sizes_suite(repeat: int, max_size: Optional[int]) -> Iterator[Result]:
+    """
+    Raw block compression and decompression by input size, from the per-call
+    overhead of small messages up to large inputs.
+    """
+    for label, data in size_class_inputs():
+        if max_size is None or len(data) <= max_size:
+            yield from measure_block("sizes", label, data, repeat)
+
+
+def levels_suite(repeat: int, max_size: Optional[int]) -> Iterator[Result]:
+    """
+    Ratio and throughput of every compression level, and of fragmented
+    compression, on part of a few fixtures.
+    """
+    size = min(LEVEL_INPUT_SIZE, max_size or LEVEL_INPUT_SIZE)
+    for name, data in load_fixtures(LEVEL_FIXTURES).items():
+        data = data[:size]
+        variants: List[Tuple[str, Callable[[bytes], bytes]]] = [
+            (
+                f"level {level}",
+                lambda buf, level=level: py_snappy.compress(buf, level=level),
+            )
+            for level in range(MIN_LEVEL, MAX_LEVEL + 1)
+        ]
+        variants.append(
+            (
+                "fragmented",
+                lambda buf: py_snappy.compress(
+                    buf, max_offset=MAX_COPY2_OFFSET, fragmented=True
+                ),
+            )
+        )
+        for impl, compress in variants:
+            yield from measure_block("levels", name, data, repeat, compress, impl)
+
+
+def framing_suite(repeat: int, max_size: Optional[int]) -> Iterator[Result]:
+    """
+    Framing format streams, which add chunking and CRC-32C checksums to raw
+    block compression, and the checksum on its own.
+    """
+    for name, data in load_fixtures(LEVEL_FIXTURES).items():
+        data = data[:max_size]
+
+        def frame() -> bytes:
+            compressor = StreamCompressor()
+            return compressor.add_chunk(data) + compressor.flush()
+
+        def unframe() -> bytes:
+            decompressor = StreamDecompressor()
+            return decompressor.decompress(framed) + decompressor.flush()
+
+        framed = frame()
+        assert unframe() == data
+        yield {
+            "suite": "framing",
+            "name": name,
+            "impl": "py_snappy",
+            "size": len(data),
+            "ratio": len(framed) / len(data),
+            "compress_mb_s": throughput(len(data), best_time(frame, repeat)),
+            "decompress_mb_s": throughput(len(data), best_time(unframe, repeat)),
+            "crc32c_mb_s": throughput(
+                len(data), best_time(lambda: crc32c(data), repeat)
+            ),
+        }
+
+
+SUITES = {
+    "corpus": corpus_suite,
+    "sizes": sizes_suite,
+    "levels": levels_suite,
+    "framing": framing_suite,
+}
@@ -1,2 +1,29 @@
 from .exceptions import BaseSnappyError, CorruptError, TooLargeError  # noqa: F401
-from .main import compress, decompress  # noqa: F401
+from .main import (  # noqa: F401
+    Compressor,
+    Tags,
+    decompress_into,
+    get_default_max_length,
+    set_default_max_length,
+    uncompressed_length,
+    validate,
+)
+from .backends import (  # noqa: F401
+    available_backends,
+    compress,
+    decompress,
+    get_backend,
+    set_backend,
+)
+from .decoder import BlockDecoder, iter_decompress  # noqa: F401
+from .stats import CompressionStats  # noqa: F401
+from .tags import iter_tags  # noqa: F401
+from .batch import compress_many, decompress_many  # noqa: F401
+from .framing import StreamCompressor, StreamDecompressor  # noqa: F401
+from .parallel import compress_parallel, decompress_parallel  # noqa: F401
+from .ssz_snappy import (  # noqa: F401
+    SszSnappyCompressor,
+    SszSnappyDecompressor,
+    compress_ssz_snappy,
+    decompress_ssz_snappy,
+)
@@ -0,0 +1,203 @@
+# Optional dispatch of compress and decompress to an installed native snappy
+# codec. The pure Python implementation in main is the reference and the
+# default. A native backend is only used once selected, through the
+# PY_SNAPPY_BACKEND environment variable at import time or through
+# set_backend, and only for calls it can serve with the same semantics:
+# compress calls that use the default encoder options, and decompress calls,
+# whose length header is checked in Python first so that TooLargeError and
+# CorruptError are raised exactly as main.decompress raises them. Errors of
+# the native codec are translated to CorruptError. Calls given a
+# CompressionStats always run the instrumented pure Python paths of stats.
+import importlib
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional
+import warnings
+
+from .exceptions import CorruptError
+from . import main
+from .main import (
+    DEFAULT_LEVEL,
+    MAX_OFFSET,
+    BufferType,
+    byte_view,
+    check_block_length,
+    extract_meta,
+)
+from .stats import CompressionStats, compress_with_stats, decompress_with_stats
+
+
+BACKEND_ENV_VAR = "PY_SNAPPY_BACKEND"
+
+# The name of the pure Python implementation, and of the pseudo-backend that
+# picks the first installed native backend of AUTO_ORDER, or falls back to
+# pure Python.
+PURE_PYTHON = "python"
+AUTO = "auto"
+AUTO_ORDER = ("cramjam", "python-snappy")
+
+
+class Backend(NamedTuple):
+    name: str
+    compress: Callable[[BufferType], bytes]
+    decompress: Callable[[BufferType], bytes]
+
+
+def _load_cramjam() -> Backend:
+    cramjam = importlib.import_module("cramjam")
+    compress_raw = cramjam.snappy.compress_raw
+    decompress_raw = cramjam.snappy.decompress_raw
+    error = cramjam.DecompressionError
+
+    def compress(buf: BufferType) -> bytes:
+        return bytes(compress_raw(buf))
+
+    def decompress(buf: BufferType) -> bytes:
+        try:
+            return bytes(decompress_raw(buf))
+        except error as err:
+            raise CorruptError(str(err)) from err
+
+    return Backend("cramjam", compress, decompress)
+
+
+def _load_python_snappy() -> Backend:
+    snappy = importlib.import_module("snappy")
+    error = snappy.UncompressError
+
+    def compress(buf: BufferType) -> bytes:
+        return bytes(snappy.compress(buf))
+
+    def decompress(buf: BufferType) -> bytes:
+        try:
+            return bytes(snappy.decompress(buf))
+        except error as err:
+            raise CorruptError(str(err)) from err
+
+    return Backend("python-snappy", compress, decompress)
+
+
+LOADERS: Dict[str, Callable[[], Backend]] = {
+    "cramjam": _load_cramjam,
+    "python-snappy": _load_python_snappy,
+}
+
+# The selected native backend, or None for pure Python.
+_backend: Optional[Backend] = None
+
+
+def available_backends() -> List[str]:
+    """
+    Return the names of the backends that can be selected in this
+    environment, pure Python first.
+    """
+    names = [PURE_PYTHON]
+    for name, loader in LOADERS.items():
+        try:
+            loader()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_backend() -> str:
+    """
+    Return the name of the active backend.
+    """
+    return PURE_PYTHON if _backend is None else _backend.name
+
+
+def set_backend(name: str) -> str:
+    """
+    Select the backend that ``compress`` and ``decompress`` dispatch to and
+    return its name.
+
+    name is PURE_PYTHON, one of LOADERS, or AUTO for the first installed one
+    of AUTO_ORDER, falling back to pure Python. Raises ValueError for an
+    unknown name and ImportError if the named codec is not installed.
+    """
+    global _backend
+    if name == PURE_PYTHON:
+        _backend = None
+    elif name == AUTO:
+        _backend = None
+        for candidate in AUTO_ORDER:
+            try:
+                _backend = LOADERS[candidate]()
+            except ImportError:
+                continue
+            break
+    elif name in LOADERS:
+        _backend = LOADERS[name]()
+    else:
+        raise ValueError(
+            f"Unknown snappy backend {name!r}, expected one of "
+            f"{', '.join([PURE_PYTHON, AUTO, *LOADERS])}"
+        )
+    return get_backend()
+
+
+def compress(
+    buf: BufferType,
+    max_offset: int = MAX_OFFSET,
+    level: int = DEFAULT_LEVEL,
+    fragmented: bool = False,
+    stats: Optional[CompressionStats] = None,
+) -> bytes:
+    """
+    compress returns the compressed form of buf. See ``main.compress``.
+
+    Calls with non-default encoder options always run in pure Python, since
+    native codecs do not offer them. If stats is given, the work done is
+    recorded into it by the slower ``stats.compress_with_stats``.
+    """
+    if stats is not None:
+        return compress_with_stats(buf, stats, max_offset, level, fragmented)
+    backend = _backend
+    if (
+        backend is None
+        or max_offset != MAX_OFFSET  # noqa: W503
+        or level != DEFAULT_LEVEL  # noqa: W503
+        or fragmented  # noqa: W503
+    ):
+        return main.compress(buf, max_offset, level, fragmented)
+    return backend.compress(buf)
+
+
+def decompress(
+    buf: BufferType,
+    max_length: Optional[int] = None,
+    stats: Optional[CompressionStats] = None,
+) -> bytes:
+    """
+    decompress returns the decompressed form of buf. See ``main.decompress``.
+
+    If stats is given, the elements decoded are recorded into it by the
+    slower ``stats.decompress_with_stats``.
+    """
+    if stats is not None:
+        return decompress_with_stats(buf, stats, max_length)
+    backend = _backend
+    if backend is None:
+        return main.decompress(buf, max_length)
+    src = byte_view(buf)
+    block_length, length_header_size = extract_meta(src, max_length)
+    check_block_length(len(src), length_header_size, block_length)
+    return backend.decompress(src)
+
+
+def _select_from_environment() -> None:
+    name = os.environ.get(BACKEND_ENV_VAR)
+    if not name:
+        return
+    try:
+        set_backend(name)
+    except (ImportError, ValueError) as err:
+        warnings.warn(
+            f"{BACKEND_ENV_VAR}={name} cannot be used, "
+            f"falling back to pure Python: {err}",
+            RuntimeWarning,
+        )
+
+
+_select_from_environment()
@@ -0,0 +1,114 @@
+import array
+from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+
+from .exceptions import BaseSnappyError
+from .main import (
+    BufferType,
+    byte_view,
+    check_block_length,
+    decompress,
+    decompress_block,
+    extract_meta,
+    get_compressor,
+)
+
+
+class BatchResult(NamedTuple):
+    """
+    The results of a batch call, concatenated into a single buffer.
+
+    The result for item i is ``data[offsets[i]:offsets[i + 1]]``. Items that
+    failed are empty and their error is found in ``errors`` under their index.
+    """
+
+    data: bytearray
+    offsets: "array.array[int]"
+    errors: Dict[int, BaseSnappyError]
+
+
+ItemResult = Union[bytes, BaseSnappyError]
+
+
+def compress_many(
+    bufs: Iterable[BufferType], concatenate: bool = False
+) -> Union[List[ItemResult], BatchResult]:
+    """
+    Compress every buffer of bufs with a single Compressor.
+
+    By default, return a list holding the compressed form of each item, or the
+    error raised while compressing it. With concatenate=True, return a
+    BatchResult instead so that no Python object is created per item.
+    """
+    compressor = get_compressor()
+    if not concatenate:
+        results: List[ItemResult] = []
+        for buf in bufs:
+            try:
+                results.append(compressor.compress(buf))
+            except BaseSnappyError as err:
+                results.append(err.with_traceback(None))
+        return results
+
+    out = bytearray()
+    offsets = array.array("Q", [0])
+    errors: Dict[int, BaseSnappyError] = {}
+    pos = 0
+    for index, buf in enumerate(bufs):
+        try:
+            pos += compressor.compress_into(buf, out, pos)
+        except BaseSnappyError as err:
+            errors[index] = err.with_traceback(None)
+        offsets.append(pos)
+    del out[pos:]
+    return BatchResult(out, offsets, errors)
+
+
+def decompress_many(
+    bufs: Iterable[BufferType],
+    concatenate: bool = False,
+    max_length: Optional[int] = None,
+) -> Union[List[ItemResult], BatchResult]:
+    """
+    Decompress every buffer of bufs. Items decoding to more than max_length
+    bytes fail with TooLargeError.
+
+    By default, return a list holding the decompressed form of each item, or
+    the error raised while decompressing it. With concatenate=True, decode
+    every item straight into one shared buffer and return a BatchResult.
+    """
+    if not concatenate:
+        results: List[ItemResult] = []
+        for buf in bufs:
+            try:
+                results.append(decompress(buf, max_length))
+            except BaseSnappyError as err:
+                results.append(err.with_traceback(None))
+        return results
+
+    out = bytearray()
+    view = memoryview(out)
+    offsets = array.array("Q", [0])
+    errors: Dict[int, BaseSnappyError] = {}
+    pos = 0
+    for index, buf in enumerate(bufs):
+        try:
+            src = byte_view(buf)
+            block_length, length_header_size = extract_meta(src, max_length)
+            check_block_length(len(src), length_header_size, block_length)
+            end = pos + block_length
+            if end > len(out):
+                # Grow geometrically so that many small items do not each
+                # resize the buffer.
+                view.release()
+                out.extend(bytes(max(end - len(out), len(out))))
+                view = memoryview(out)
+            decompress_block(src, length_header_size, view[pos:end])
+            pos = end
+        except BaseSnappyError as err:
+            # Drop the traceback, which would otherwise keep views into out
+            # alive and prevent it from growing.
+            errors[index] = err.with_traceback(None)
+        offsets.append(pos)
+    view.release()
+    del out[pos:]
+    return BatchResult(out, offsets, errors)
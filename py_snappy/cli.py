@@ -0,0 +1,436 @@
+# The command line interface, run as ``python -m py_snappy`` or as the
+# ``py-snappy`` console script.
+#
+# Regular input files are memory-mapped, and framing format streams are
+# compressed and decompressed a window of INPUT_WINDOW bytes at a time, so
+# that memory use does not grow with the size of the input, also when they
+# are split across processes with --jobs. Raw blocks are always handled whole.
+import argparse
+import contextlib
+import itertools
+import mmap
+import os
+import sys
+import traceback
+from typing import (
+    Any,
+    BinaryIO,
+    Generator,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+)
+
+from .backends import decompress
+from .constants import (
+    DEFAULT_MAX_LENGTH,
+    MAX_UNCOMPRESSED_CHUNK_LEN,
+    STREAM_IDENTIFIER_CHUNK,
+)
+from .exceptions import BaseSnappyError
+from .framing import StreamCompressor, StreamDecompressor
+from .main import DEFAULT_LEVEL, MAX_LEVEL, MIN_LEVEL, BufferType, get_compressor
+from .parallel import iter_compress_parallel, iter_decompress_parallel
+from .stats import CompressionStats, record_tags
+from .tags import TAG_NAMES, iter_tags
+
+
+STDIO = "-"
+
+# Input formats. AUTO picks FRAMED for input that starts with a stream
+# identifier and RAW for anything else.
+RAW = "raw"
+FRAMED = "framed"
+AUTO = "auto"
+
+# Framed streams are read a window of this many bytes at a time, a whole
+# number of framing chunks, and the output of each window is written at once.
+INPUT_WINDOW = 16 * MAX_UNCOMPRESSED_CHUNK_LEN
+
+
+def is_mappable(path: str) -> bool:
+    """
+    Return whether path is a file that can be memory-mapped: neither stdin, a
+    pipe or another special file, nor empty.
+    """
+    return path != STDIO and os.path.isfile(path) and os.path.getsize(path) > 0
+
+
+@contextlib.contextmanager
+def open_input(path: str) -> Iterator[BufferType]:
+    """
+    Yield the contents of the file at path, or of stdin for STDIO. Regular
+    files are memory-mapped rather than read.
+    """
+    if path == STDIO:
+        yield sys.stdin.buffer.read()
+        return
+    with open(path, "rb") as input_file:
+        if not is_mappable(path):
+            yield input_file.read()
+            return
+        mapped = mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield mapped
+        except BaseException as err:
+            # Views of the mapping taken by the code that raised are still
+            # held by the frames of its traceback, and would keep the
+            # mapping from being closed.
+            clear_traceback_frames(err)
+            raise
+        finally:
+            mapped.close()
+
+
+def clear_traceback_frames(err: BaseException) -> None:
+    """
+    Drop the local variables of the finished frames in the tracebacks of err
+    and of the errors it was raised from or while handling.
+    """
+    seen: Set[int] = set()
+    error: Optional[BaseException] = err
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        traceback.clear_frames(error.__traceback__)
+        error = error.__cause__ or error.__context__
+
+
+def iter_windows(path: str) -> Generator[bytes, None, None]:
+    """
+    Yield the contents of the file at path, or of stdin for STDIO,
+    INPUT_WINDOW bytes at a time. Regular files are memory-mapped rather
+    than read.
+    """
+    if path == STDIO:
+        yield from read_windows(sys.stdin.buffer)
+        return
+    with open(path, "rb") as input_file:
+        if not is_mappable(path):
+            yield from read_windows(input_file)
+            return
+        with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                # Python 3.8 and later: let the kernel read ahead, and drop
+                # pages once they have been read.
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            for start in range(0, len(mapped), INPUT_WINDOW):
+                yield mapped[start : start + INPUT_WINDOW]  # noqa: E203
+
+
+def read_windows(stream: BinaryIO) -> Iterator[bytes]:
+    while True:
+        data = stream.read(INPUT_WINDOW)
+        if not data:
+            return
+        yield data
+
+
+@contextlib.contextmanager
+def open_output(path: str) -> Iterator[BinaryIO]:
+    """
+    Yield the file at path, or stdout for STDIO, opened for writing. A file
+    is removed again if an error is raised before it is complete.
+    """
+    if path == STDIO:
+        yield sys.stdout.buffer
+        sys.stdout.buffer.flush()
+        return
+    output = open(path, "wb")
+    try:
+        with output:
+            yield output
+    except BaseException:
+        os.remove(path)
+        raise
+
+
+def compress_file(path: str, output: BinaryIO, args: argparse.Namespace) -> None:
+    if args.format == RAW:
+        with open_input(path) as buf:
+            out = bytearray()
+            out_len = get_compressor().compress_into(buf, out, level=args.level)
+            with memoryview(out) as view:
+                output.write(view[:out_len])
+    elif args.jobs > 1:
+        for piece in iter_compress_parallel(iter_windows(path), max_workers=args.jobs):
+            output.write(piece)
+    else:
+        compressor = StreamCompressor(args.level)
+        for window in iter_windows(path):
+            output.write(compressor.add_chunk(window))
+        output.write(compressor.flush())
+
+
+def decompress_file(path: str, output: BinaryIO, args: argparse.Namespace) -> None:
+    windows = iter_windows(path)
+    head = next(windows, b"")
+    input_format = args.format
+    if input_format == AUTO:
+        is_framed = not head or head.startswith(STREAM_IDENTIFIER_CHUNK)
+        input_format = FRAMED if is_framed else RAW
+
+    if input_format == RAW:
+        # A raw block is needed at once. Files are mapped afresh, anything
+        # else is read to the end.
+        if is_mappable(path):
+            windows.close()
+            with open_input(path) as buf:
+                output.write(decompress(buf, args.max_length))
+        else:
+            output.write(decompress(head + b"".join(windows), args.max_length))
+        return
+
+    pieces = itertools.chain((head,), windows)
+    if args.jobs > 1:
+        for piece in iter_decompress_parallel(
+            pieces, max_workers=args.jobs, verify_checksums=args.verify_checksums
+        ):
+            output.write(piece)
+        return
+
+    decompressor = StreamDecompressor(args.verify_checksums, args.max_length)
+    for window in pieces:
+        output.write(decompressor.decompress(window))
+    output.write(decompressor.flush())
+
+
+def compress_command(args: argparse.Namespace) -> int:
+    with open_output(args.output) as output:
+        compress_file(args.input, output, args)
+    return 0
+
+
+def decompress_command(args: argparse.Namespace) -> int:
+    with open_output(args.output) as output:
+        decompress_file(args.input, output, args)
+    return 0
+
+
+def cat_command(args: argparse.Namespace) -> int:
+    output = sys.stdout.buffer
+    for path in args.inputs:
+        decompress_file(path, output, args)
+    output.flush()
+    return 0
+
+
+def histogram_lines(
+    label: str, counts: Mapping[int, int], key_format: Any
+) -> List[str]:
+    lines = [label]
+    total = sum(counts.values())
+    for key, count in sorted(counts.items()):
+        lines.append(f"  {key_format(key):>13}  {count:>10}  {count / total:>7.1%}")
+    return lines
+
+
+def offset_range(bit_length: int) -> str:
+    low, high = 1 << (bit_length - 1), (1 << bit_length) - 1
+    return str(low) if low == high else f"{low}-{high}"
+
+
+def summary_lines(stats: CompressionStats) -> List[str]:
+    ratio = 1.0
+    if stats.uncompressed_bytes:
+        ratio = stats.compressed_bytes / stats.uncompressed_bytes
+    lines = [
+        f"block length       {stats.uncompressed_bytes} bytes",
+        f"compressed length  {stats.compressed_bytes} bytes (ratio {ratio:.3f})",
+        f"literals           {stats.literal_count} elements, "
+        f"{stats.literal_bytes} bytes",
+        f"copies             {stats.copy_count} elements, {stats.copy_bytes} bytes "
+        f"(COPY_1 {stats.copy1_count}, COPY_2 {stats.copy2_count}, "
+        f"COPY_4 {stats.copy4_count})",
+    ]
+    if stats.copy_count:
+        lines += histogram_lines("copy lengths", stats.match_lengths, str)
+        lines += histogram_lines("copy offsets", stats.offsets, offset_range)
+    return lines
+
+
+def inspect_command(args: argparse.Namespace) -> int:
+    stats = CompressionStats()
+    output = sys.stdout
+    with open_input(args.input) as buf:
+        if args.tags:
+            header = f"{'position':>10}  {'output':>10}  {'kind':<7}  {'length':>8}"
+            output.write(f"{header}  offset\n")
+        d = 0
+        for tags in iter_tags(buf, args.max_length):
+            record_tags(stats, tags)
+            if args.tags:
+                lines = []
+                for kind, position, length, offset in tags:
+                    line = f"{position:>10}  {d:>10}  {TAG_NAMES[kind]:<7}  {length:>8}"
+                    lines.append(f"{line}  {offset}\n" if offset else f"{line}\n")
+                    d += length
+                output.write("".join(lines))
+        stats.calls += 1
+        stats.uncompressed_bytes += stats.literal_bytes + stats.copy_bytes
+        stats.compressed_bytes += len(buf)
+
+    output.write("\n".join(summary_lines(stats)) + "\n")
+    return 0
+
+
+def positive_int(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return number
+
+
+def add_decompress_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--format",
+        choices=(AUTO, FRAMED, RAW),
+        default=AUTO,
+        help="the input format: a framing format stream, a raw block, or either, "
+        "told apart by the stream identifier (default: auto)",
+    )
+    parser.add_argument(
+        "--max-length",
+        type=int,
+        help="reject input that decompresses to more than this many bytes (default: "
+        f"{DEFAULT_MAX_LENGTH} for raw blocks, no limit for framed streams)",
+    )
+    parser.add_argument(
+        "--no-verify",
+        dest="verify_checksums",
+        action="store_false",
+        help="do not verify the checksums of framed streams",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=positive_int,
+        default=1,
+        help="decompress framed streams on this many processes",
+    )
+
+
+def check_arguments(parser: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if args.command == "compress" and args.jobs > 1:
+        if args.format == RAW:
+            parser.error("--jobs only applies to the framed format")
+        if args.level != DEFAULT_LEVEL:
+            parser.error("--jobs only supports the default --level")
+    if args.command in ("decompress", "cat") and args.jobs > 1:
+        if args.format == RAW:
+            parser.error("--jobs only applies to the framed format")
+        if args.max_length is not None:
+            parser.error("--jobs does not support --max-length")
+
+
+def build_parser(prog: Optional[str] = None) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog=prog, description="Work with snappy compressed data."
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+    subparsers.required = True
+
+    compress_parser = subparsers.add_parser(
+        "compress",
+        help="compress a file",
+        description="Compress a file, or stdin, into the snappy framing format or "
+        "a raw snappy block.",
+    )
+    compress_parser.add_argument(
+        "input", nargs="?", default=STDIO, help="the file to compress (default: stdin)"
+    )
+    compress_parser.add_argument(
+        "--output", "-o", default=STDIO, help="the file to write (default: stdout)"
+    )
+    compress_parser.add_argument(
+        "--format",
+        choices=(FRAMED, RAW),
+        default=FRAMED,
+        help="write a framing format stream or a single raw block (default: framed)",
+    )
+    compress_parser.add_argument(
+        "--level",
+        type=int,
+        choices=range(MIN_LEVEL, MAX_LEVEL + 1),
+        default=DEFAULT_LEVEL,
+        help=f"the compression level (default: {DEFAULT_LEVEL})",
+    )
+    compress_parser.add_argument(
+        "--jobs",
+        "-j",
+        type=positive_int,
+        default=1,
+        help="compress framed streams on this many processes",
+    )
+    compress_parser.set_defaults(run=compress_command)
+
+    decompress_parser = subparsers.add_parser(
+        "decompress",
+        help="decompress a file",
+        description="Decompress a snappy framing format stream or raw snappy block "
+        "from a file, or stdin.",
+    )
+    decompress_parser.add_argument(
+        "input",
+        nargs="?",
+        default=STDIO,
+        help="the file to decompress (default: stdin)",
+    )
+    decompress_parser.add_argument(
+        "--output", "-o", default=STDIO, help="the file to write (default: stdout)"
+    )
+    add_decompress_arguments(decompress_parser)
+    decompress_parser.set_defaults(run=decompress_command)
+
+    cat_parser = subparsers.add_parser(
+        "cat",
+        help="decompress files to stdout",
+        description="Decompress each file in turn to stdout.",
+    )
+    cat_parser.add_argument(
+        "inputs", nargs="*", default=[STDIO], metavar="input", help="(default: stdin)"
+    )
+    add_decompress_arguments(cat_parser)
+    cat_parser.set_defaults(run=cat_command)
+
+    inspect_parser = subparsers.add_parser(
+        "inspect",
+        help="summarize the elements of a compressed block",
+        description="Check a raw compressed block without decompressing it and "
+        "summarize the literals and copies it is made of.",
+    )
+    inspect_parser.add_argument(
+        "input", nargs="?", default=STDIO, help="the compressed block (default: stdin)"
+    )
+    inspect_parser.add_argument(
+        "--tags", action="store_true", help="also list every element of the block"
+    )
+    inspect_parser.add_argument(
+        "--max-length",
+        type=int,
+        help=f"reject blocks that decode to more than this many bytes (default: "
+        f"{DEFAULT_MAX_LENGTH})",
+    )
+    inspect_parser.set_defaults(run=inspect_command)
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None, prog: Optional[str] = None) -> int:
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+    check_arguments(parser, args)
+    try:
+        return int(args.run(args))
+    except BaseSnappyError as err:
+        message = f": {err}" if str(err) else ""
+        sys.stderr.write(f"py_snappy: {type(err).__name__}{message}\n")
+        return 1
+    except BrokenPipeError:
+        # The reader of stdout went away, as with ``| head``.
+        sys.stderr.close()
+        return 1
+    except OSError as err:
+        sys.stderr.write(f"py_snappy: {err}\n")
+        return 1
@@ -3,7 +3,37 @@ TAG_COPY1 = 0x01
 TAG_COPY2 = 0x02
 TAG_COPY4 = 0x03
 
-# https://code.google.com/p/snappy/source/browse/trunk/framing_format.txt says
-# that "the uncompressed data in a chunk must be no longer than 65536 bytes".
-# TODO: enforce this.
+# The largest decoded block length the format allows, and the initial limit
+# of calls that are not given a ``max_length``. Applications decoding
+# untrusted input should lower that limit with ``set_default_max_length`` or
+# pass a tighter ``max_length``.
+DEFAULT_MAX_LENGTH = 0x7FFFFFFF
+
+# No element decodes to more than 64 bytes per 3 bytes of input (a COPY_2 tag
+# of length 64), which bounds the decoded length of any valid block.
+MAX_EXPANSION_NUMERATOR = 64
+MAX_EXPANSION_DENOMINATOR = 3
+
+# https://github.com/google/snappy/blob/master/framing_format.txt says that
+# "the uncompressed data in a chunk must be no longer than 65536 bytes".
 MAX_UNCOMPRESSED_CHUNK_LEN = 65536
+
+# Chunk types of the framing format.
+CHUNK_TYPE_COMPRESSED_DATA = 0x00
+CHUNK_TYPE_UNCOMPRESSED_DATA = 0x01
+CHUNK_TYPE_PADDING = 0xFE
+CHUNK_TYPE_STREAM_IDENTIFIER = 0xFF
+
+# Chunk types in [0x02, 0x7F] are reserved and must not be skipped, chunk
+# types in [0x80, 0xFD] are reserved and can be skipped.
+MIN_RESERVED_UNSKIPPABLE_CHUNK_TYPE = 0x02
+MAX_RESERVED_UNSKIPPABLE_CHUNK_TYPE = 0x7F
+
+# Every chunk starts with a 1 byte chunk type and a 3 byte little-endian
+# length; data chunks then carry a 4 byte masked CRC-32C of the uncompressed
+# data.
+CHUNK_HEADER_SIZE = 4
+CHECKSUM_SIZE = 4
+
+STREAM_IDENTIFIER = b"sNaPpY"
+STREAM_IDENTIFIER_CHUNK = b"\xff\x06\x00\x00" + STREAM_IDENTIFIER
@@ -0,0 +1,107 @@
+import struct
+import sys
+from typing import Iterable, Tuple
+
+from .main import BufferType, byte_view
+
+
+# CRC-32C (Castagnoli), reflected polynomial, as required by the snappy
+# framing format.
+CRC32C_POLY = 0x82F63B78
+
+
+def _make_tables() -> Tuple[Tuple[int, ...], ...]:
+    """
+    Build the eight lookup tables used by the slicing-by-8 algorithm.
+
+    Table 0 is the classic byte-at-a-time table. Table k holds the CRC of a
+    byte followed by k zero bytes, so that eight input bytes can be folded
+    into the CRC with eight independent lookups.
+    """
+    table = []
+    for n in range(256):
+        crc = n
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ CRC32C_POLY
+            else:
+                crc >>= 1
+        table.append(crc)
+
+    tables = [table]
+    for _ in range(7):
+        previous = tables[-1]
+        tables.append(
+            [(previous[n] >> 8) ^ table[previous[n] & 0xFF] for n in range(256)]
+        )
+    return tuple(tuple(t) for t in tables)
+
+
+CRC32C_TABLES = _make_tables()
+CRC32C_TABLE = CRC32C_TABLES[0]
+
+# When the native unsigned int is a 4 byte little-endian word, a memoryview
+# cast reads the input as words without copying it, which is the fastest way
+# to feed the slicing-by-8 loop. Otherwise fall back to struct unpacking.
+_NATIVE_LITTLE_ENDIAN_WORDS = sys.byteorder == "little" and struct.calcsize("I") == 4
+
+
+def _iter_word_pairs(view: memoryview) -> Iterable[Tuple[int, int]]:
+    """
+    Iterate over view, whose length must be a multiple of 8, as pairs of
+    little-endian 32-bit words.
+    """
+    if _NATIVE_LITTLE_ENDIAN_WORDS:
+        words = view.cast("I")
+        return zip(words[::2], words[1::2])
+    else:
+        return struct.iter_unpack("<II", view)
+
+
+def crc32c(buf: BufferType, crc: int = 0) -> int:
+    """
+    Return the CRC-32C checksum of buf, continuing from a previous checksum
+    crc when one is given.
+
+    The bulk of buf, including every full 64 KiB framing chunk, is processed
+    eight bytes at a time straight out of its memory, without copying it.
+    """
+    t0, t1, t2, t3, t4, t5, t6, t7 = CRC32C_TABLES
+    view = byte_view(buf)
+    if not isinstance(view, memoryview):
+        view = memoryview(view)
+    bulk_len = len(view) & ~7
+
+    crc ^= 0xFFFFFFFF
+    if bulk_len:
+        for lo, hi in _iter_word_pairs(view[:bulk_len]):
+            crc ^= lo
+            crc = (
+                t7[crc & 0xFF]
+                ^ t6[(crc >> 8) & 0xFF]  # noqa: W503
+                ^ t5[(crc >> 16) & 0xFF]  # noqa: W503
+                ^ t4[crc >> 24]  # noqa: W503
+                ^ t3[hi & 0xFF]  # noqa: W503
+                ^ t2[(hi >> 8) & 0xFF]  # noqa: W503
+                ^ t1[(hi >> 16) & 0xFF]  # noqa: W503
+                ^ t0[hi >> 24]  # noqa: W503
+            )
+    for byte in view[bulk_len:]:
+        crc = t0[(crc ^ byte) & 0xFF] ^ (crc >> 8)
+    return crc ^ 0xFFFFFFFF
+
+
+def mask_checksum(crc: int) -> int:
+    """
+    Return the masked form of a CRC-32C checksum, as stored in snappy framing
+    format chunks.
+    """
+    return (((crc >> 15) | (crc << 17)) + 0xA282EAD8) & 0xFFFFFFFF
+
+
+def masked_crc32c(buf: BufferType) -> int:
+    """
+    Return the masked CRC-32C checksum of buf, as stored in snappy framing
+    format chunks.
+    """
+    return mask_checksum(crc32c(buf))
@@ -0,0 +1,127 @@
+from typing import Iterable, Iterator, Optional
+
+from .constants import TAG_LITERAL
+from .exceptions import CorruptError
+from .main import BufferType, byte_view, extract_meta, iter_elements, uvarint
+
+
+class BlockDecoder:
+    """
+    Incrementally decompress a single snappy block.
+
+    The compressed block can be fed in pieces of any size. Each call to
+    ``feed`` decodes every element whose bytes are complete, including the
+    available part of a long literal, and returns the output it produced.
+    Only the unconsumed tail of the input, at most the few bytes of an
+    incomplete tag, is kept between calls.
+
+    Copies may refer back to any earlier part of the block, so the decoded
+    output is also kept until the block is complete. It grows with the data
+    that was actually decoded, rather than being allocated from the length
+    header, which must not exceed max_length.
+    """
+
+    def __init__(self, max_length: Optional[int] = None) -> None:
+        self._buf = bytearray()
+        self._out = bytearray()
+        self._max_length = max_length
+        self._block_length = -1
+        self._literal_remaining = 0
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether the whole block has been decoded.
+        """
+        return len(self._out) == self._block_length
+
+    def feed(self, data: BufferType) -> bytes:
+        """
+        Return the decoded output of the elements completed by data.
+        """
+        self._buf += byte_view(data)
+        start = len(self._out)
+        consumed = self._decode(self._buf)
+        del self._buf[:consumed]
+        return bytes(self._out[start:])
+
+    def flush(self) -> bytes:
+        """
+        Check that the block is complete and that no input is left over.
+        """
+        if not self.done or self._buf:
+            raise CorruptError("Snappy block is truncated")
+        return b""
+
+    def _decode(self, src: bytearray) -> int:
+        """
+        Decode the complete elements at the start of src into the output and
+        return the number of input bytes consumed.
+        """
+        src_len = len(src)
+        pos = 0
+
+        if self._block_length < 0:
+            _, num_bytes = uvarint(src)
+            if num_bytes == 0 and src_len < 10:
+                return 0
+            self._block_length, pos = extract_meta(src, self._max_length)
+
+        dst = self._out
+        block_length = self._block_length
+        d = len(dst)
+
+        if self._literal_remaining:
+            length = min(self._literal_remaining, src_len)
+            dst += src[:length]
+            d += length
+            pos += length
+            self._literal_remaining -= length
+
+        for elem_type, end, length, offset in iter_elements(src, pos):
+            if d == block_length:
+                raise CorruptError("Snappy block has trailing data")
+            if end > src_len and not length:
+                # The tag is incomplete; wait for the rest of it.
+                break
+            if length > block_length - d:
+                raise CorruptError
+
+            if elem_type == TAG_LITERAL:
+                # Emit whatever part of the literal is available and carry
+                # the rest over to the next call.
+                start = end - length
+                available = min(length, src_len - start)
+                dst += src[start : start + available]  # noqa: E203
+                d += available
+                pos = start + available
+                self._literal_remaining = length - available
+                continue
+
+            if offset == 0 or offset > d:
+                raise CorruptError
+            if offset >= length:
+                dst += dst[d - offset : d - offset + length]  # noqa: E203
+            else:
+                repeat = length // offset + 1
+                dst += (dst[d - offset : d] * repeat)[:length]  # noqa: E203
+            d += length
+            pos = end
+
+        return pos
+
+
+def iter_decompress(
+    pieces: Iterable[BufferType], max_length: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Decompress a single snappy block given as an iterable of pieces of any
+    size, such as the reads from a socket, yielding the decoded output as soon
+    as it is available.
+    """
+    decoder = BlockDecoder(max_length)
+    for piece in pieces:
+        output = decoder.feed(piece)
+        if output:
+            yield output
+    decoder.flush()
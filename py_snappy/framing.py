@@ -0,0 +1,281 @@
+# Implementation of the snappy framing format, described in
+# https://github.com/google/snappy/blob/master/framing_format.txt
+from typing import BinaryIO, Optional
+
+from .constants import (
+    CHECKSUM_SIZE,
+    CHUNK_HEADER_SIZE,
+    CHUNK_TYPE_COMPRESSED_DATA,
+    CHUNK_TYPE_STREAM_IDENTIFIER,
+    CHUNK_TYPE_UNCOMPRESSED_DATA,
+    DEFAULT_MAX_LENGTH,
+    MAX_RESERVED_UNSKIPPABLE_CHUNK_TYPE,
+    MAX_UNCOMPRESSED_CHUNK_LEN,
+    MIN_RESERVED_UNSKIPPABLE_CHUNK_TYPE,
+    STREAM_IDENTIFIER,
+    STREAM_IDENTIFIER_CHUNK,
+)
+from .crc32c import masked_crc32c
+from .exceptions import CorruptError, TooLargeError
+from .main import (
+    BufferType,
+    byte_view,
+    DEFAULT_LEVEL,
+    compress,
+    decompress,
+    extract_meta,
+    max_encoded_len,
+)
+
+
+# The largest chunk bodies a well-formed stream can contain. Anything larger
+# is rejected before it is buffered.
+MAX_COMPRESSED_CHUNK_LEN = CHECKSUM_SIZE + max_encoded_len(MAX_UNCOMPRESSED_CHUNK_LEN)
+MAX_UNCOMPRESSED_CHUNK_BODY_LEN = CHECKSUM_SIZE + MAX_UNCOMPRESSED_CHUNK_LEN
+
+
+def encode_chunk(chunk: BufferType, level: int = DEFAULT_LEVEL) -> bytes:
+    """
+    Return the framed form of chunk, which must hold at most
+    MAX_UNCOMPRESSED_CHUNK_LEN bytes of uncompressed data, compressed at the
+    given level.
+
+    The chunk is stored uncompressed if compressing it saves less than 12.5%.
+    """
+    checksum = masked_crc32c(chunk)
+    compressed = compress(chunk, level=level)
+    chunk_len = len(chunk)
+    if len(compressed) >= chunk_len - chunk_len // 8:
+        chunk_type, body = CHUNK_TYPE_UNCOMPRESSED_DATA, bytes(chunk)
+    else:
+        chunk_type, body = CHUNK_TYPE_COMPRESSED_DATA, compressed
+
+    body_len = CHECKSUM_SIZE + len(body)
+    header = bytes(
+        (chunk_type, body_len & 0xFF, (body_len >> 8) & 0xFF, body_len >> 16)
+    )
+    return header + checksum.to_bytes(CHECKSUM_SIZE, "little") + body
+
+
+class StreamCompressor:
+    """
+    Incrementally compress data into the snappy framing format.
+
+    Each call to ``add_chunk`` returns the framed chunks for the data it was
+    given, split into chunks of at most 64 KiB of uncompressed data. No data
+    is held back between calls. Chunks are compressed at the given level.
+    """
+
+    def __init__(self, level: int = DEFAULT_LEVEL) -> None:
+        self._header_written = False
+        self._level = level
+
+    def add_chunk(self, data: BufferType) -> bytes:
+        """
+        Return the framed form of data, preceded by the stream identifier on
+        the first call.
+        """
+        src = byte_view(data)
+        if not isinstance(src, memoryview):
+            # slice through a view so that chunks are not copied out of src
+            src = memoryview(src)
+
+        out = bytearray()
+        if not self._header_written:
+            out += STREAM_IDENTIFIER_CHUNK
+            self._header_written = True
+        for start in range(0, len(src), MAX_UNCOMPRESSED_CHUNK_LEN):
+            chunk = src[start : start + MAX_UNCOMPRESSED_CHUNK_LEN]  # noqa: E203
+            out += encode_chunk(chunk, self._level)
+        return bytes(out)
+
+    compress = add_chunk
+
+    def flush(self) -> bytes:
+        """
+        Return any data still needed to complete the stream. This is only the
+        stream identifier, if nothing was compressed yet.
+        """
+        return self.add_chunk(b"") if not self._header_written else b""
+
+
+class StreamDecompressor:
+    """
+    Incrementally decompress a stream in the snappy framing format.
+
+    Data can be fed in pieces of any size. Only the tail of the input that
+    does not yet hold a complete chunk is kept between calls, which is at most
+    one compressed chunk; padding and skippable chunks are discarded as they
+    arrive.
+
+    Chunk checksums are verified unless verify_checksums is False. When
+    max_length is given, TooLargeError is raised as soon as a chunk would
+    take the total uncompressed data past it, before the chunk is decoded.
+    """
+
+    def __init__(
+        self, verify_checksums: bool = True, max_length: Optional[int] = None
+    ) -> None:
+        self._buf = bytearray()
+        self._seen_identifier = False
+        self._skip = 0
+        self._verify_checksums = verify_checksums
+        self._max_length = max_length
+        self._output_length = 0
+
+    @property
+    def output_length(self) -> int:
+        """
+        The uncompressed length of the chunks read so far, including a chunk
+        that was rejected for taking it past max_length.
+        """
+        return self._output_length
+
+    def decompress(self, data: BufferType) -> bytes:
+        """
+        Return the uncompressed data of every chunk completed by data.
+        """
+        self._buf += byte_view(data)
+        output = bytearray()
+        consumed = self._decode_chunks(output)
+        del self._buf[:consumed]
+        return bytes(output)
+
+    def flush(self) -> bytes:
+        """
+        Check that the stream ended at a chunk boundary.
+        """
+        if self._buf or self._skip:
+            raise CorruptError("Snappy stream is truncated")
+        return b""
+
+    def _decode_chunks(self, output: bytearray) -> int:
+        """
+        Decode the complete chunks at the start of the input buffer into
+        output and return the number of input bytes consumed.
+        """
+        buf = self._buf
+        buf_len = len(buf)
+        view = memoryview(buf)
+        pos = 0
+
+        while True:
+            if self._skip:
+                skipped = min(self._skip, buf_len - pos)
+                pos += skipped
+                self._skip -= skipped
+                if self._skip:
+                    break
+
+            if buf_len - pos < CHUNK_HEADER_SIZE:
+                break
+            chunk_type = buf[pos]
+            chunk_len = buf[pos + 1] | (buf[pos + 2] << 8) | (buf[pos + 3] << 16)
+
+            if not self._seen_identifier and chunk_type != CHUNK_TYPE_STREAM_IDENTIFIER:
+                raise CorruptError(
+                    "Snappy stream does not start with a stream identifier"
+                )
+
+            if chunk_type == CHUNK_TYPE_STREAM_IDENTIFIER:
+                if chunk_len != len(STREAM_IDENTIFIER):
+                    raise CorruptError("Invalid stream identifier")
+            elif chunk_type == CHUNK_TYPE_COMPRESSED_DATA:
+                if chunk_len < CHECKSUM_SIZE or chunk_len > MAX_COMPRESSED_CHUNK_LEN:
+                    raise CorruptError("Invalid compressed chunk length")
+            elif chunk_type == CHUNK_TYPE_UNCOMPRESSED_DATA:
+                if (
+                    chunk_len < CHECKSUM_SIZE
+                    or chunk_len > MAX_UNCOMPRESSED_CHUNK_BODY_LEN  # noqa: W503
+                ):
+                    raise CorruptError("Invalid uncompressed chunk length")
+            elif (
+                MIN_RESERVED_UNSKIPPABLE_CHUNK_TYPE
+                <= chunk_type  # noqa: W503
+                <= MAX_RESERVED_UNSKIPPABLE_CHUNK_TYPE  # noqa: W503
+            ):
+                raise CorruptError(
+                    f"Unsupported unskippable chunk type {chunk_type:#x}"
+                )
+            else:
+                # Padding and reserved skippable chunks.
+                pos += CHUNK_HEADER_SIZE
+                self._skip = chunk_len
+                continue
+
+            body_start = pos + CHUNK_HEADER_SIZE
+            if buf_len - body_start < chunk_len:
+                break
+            body = view[body_start : body_start + chunk_len]  # noqa: E203
+            pos = body_start + chunk_len
+
+            if chunk_type == CHUNK_TYPE_STREAM_IDENTIFIER:
+                if body != STREAM_IDENTIFIER:
+                    raise CorruptError("Invalid stream identifier")
+                self._seen_identifier = True
+                continue
+
+            checksum = int.from_bytes(body[:CHECKSUM_SIZE], "little")
+            if chunk_type == CHUNK_TYPE_COMPRESSED_DATA:
+                block = body[CHECKSUM_SIZE:]
+                # Chunks are bounded by the format alone; the limit of the
+                # stream is checked against its output length below.
+                block_length, _ = extract_meta(block, DEFAULT_MAX_LENGTH)
+                if block_length > MAX_UNCOMPRESSED_CHUNK_LEN:
+                    raise CorruptError("Chunk decodes to more than 64 KiB")
+            else:
+                block_length = chunk_len - CHECKSUM_SIZE
+
+            self._output_length += block_length
+            if self._max_length is not None and self._output_length > self._max_length:
+                raise TooLargeError("Snappy stream decodes to more than max_length")
+
+            if chunk_type == CHUNK_TYPE_COMPRESSED_DATA:
+                chunk = decompress(block, MAX_UNCOMPRESSED_CHUNK_LEN)
+            else:
+                chunk = body[CHECKSUM_SIZE:].tobytes()
+
+            if self._verify_checksums and masked_crc32c(chunk) != checksum:
+                raise CorruptError("Chunk checksum mismatch")
+            output += chunk
+
+        return pos
+
+
+def compress_stream(
+    src: BinaryIO,
+    dst: BinaryIO,
+    blocksize: int = MAX_UNCOMPRESSED_CHUNK_LEN,
+    level: int = DEFAULT_LEVEL,
+) -> None:
+    """
+    Compress the readable file-like object src into the writable file-like
+    object dst in the snappy framing format, reading blocksize bytes at a time.
+    """
+    compressor = StreamCompressor(level)
+    while True:
+        data = src.read(blocksize)
+        if not data:
+            break
+        dst.write(compressor.add_chunk(data))
+    dst.write(compressor.flush())
+
+
+def decompress_stream(
+    src: BinaryIO,
+    dst: BinaryIO,
+    blocksize: int = MAX_UNCOMPRESSED_CHUNK_LEN,
+    verify_checksums: bool = True,
+) -> None:
+    """
+    Decompress the snappy framing format stream read from the file-like object
+    src into the writable file-like object dst, reading blocksize bytes at a
+    time.
+    """
+    decompressor = StreamDecompressor(verify_checksums)
+    while True:
+        data = src.read(blocksize)
+        if not data:
+            break
+        dst.write(decompressor.decompress(data))
+    dst.write(decompressor.flush())
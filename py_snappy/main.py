@@ -1,9 +1,20 @@
 # Based on https://github.com/StalkR/misc/commit/ba67f5e94d1b1c2cd550cf310b716c0a8101d7a0#diff-78a5f46979e1e7a85d116872e2c865d4  # noqa: E501
+import array
 import functools
-import itertools
-from typing import Any, Callable, Iterable, Tuple, TypeVar
-
-from .constants import TAG_LITERAL, TAG_COPY1, TAG_COPY2, TAG_COPY4
+import mmap
+import struct
+import threading
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, Union
+
+from .constants import (
+    DEFAULT_MAX_LENGTH,
+    MAX_EXPANSION_DENOMINATOR,
+    MAX_EXPANSION_NUMERATOR,
+    TAG_LITERAL,
+    TAG_COPY1,
+    TAG_COPY2,
+    TAG_COPY4,
+)
 from .exceptions import BaseSnappyError, CorruptError, TooLargeError
 
 
@@ -27,7 +38,9 @@ from .exceptions import BaseSnappyError, CorruptError, TooLargeError
 #   - For l == 2, the offset ranges in [0, 1<<16) and the length in [1, 65).
 #     The length is 1 + m. The offset is the little-endian unsigned integer
 #     denoted by the next 2 bytes.
-#   - For l == 3, this tag is a legacy format that is no longer supported.
+#   - For l == 3, the offset ranges in [0, 1<<32) and the length in [1, 65).
+#     The length is 1 + m. The offset is the little-endian unsigned integer
+#     denoted by the next 4 bytes.
 
 
 def uint8(n: int) -> int:
@@ -42,7 +55,26 @@ def uint64(n: int) -> int:
     return n & ((1 << 64) - 1)
 
 
-def uvarint(buf: bytes) -> Tuple[int, int]:
+# Any object supporting the buffer protocol with a contiguous memory layout.
+BufferType = Union[bytes, bytearray, memoryview, mmap.mmap, "array.array[Any]"]
+
+
+def byte_view(buf: BufferType) -> Union[bytes, bytearray, memoryview]:
+    """
+    Return an object indexing the unsigned bytes of buf, without copying it.
+
+    ``bytes`` and ``bytearray`` are returned unchanged since indexing them is
+    cheaper than indexing a ``memoryview``.
+    """
+    if isinstance(buf, (bytes, bytearray)):
+        return buf
+    view = memoryview(buf)
+    if view.format != "B" or view.ndim != 1:
+        view = view.cast("B")
+    return view
+
+
+def uvarint(buf: BufferType) -> Tuple[int, int]:
     """
     uvarint decodes a uint64 from buf and returns that value and the number of
     bytes read (> 0). If an error occurred, the value is 0 and the number of
@@ -61,9 +93,6 @@ def uvarint(buf: bytes) -> Tuple[int, int]:
     return 0, 0
 
 
-TReturn = TypeVar("TReturn")
-
-
 def bytes_gen(fn: Callable[..., Iterable[int]]) -> Callable[..., bytes]:
     @functools.wraps(fn)
     def inner(*args: Any, **kwargs: Any) -> bytes:
@@ -72,16 +101,6 @@ def bytes_gen(fn: Callable[..., Iterable[int]]) -> Callable[..., bytes]:
     return inner
 
 
-def tuple_gen(
-    fn: Callable[..., Iterable[TReturn]]
-) -> Callable[..., Tuple[TReturn, ...]]:
-    @functools.wraps(fn)
-    def inner(*args: Any, **kwargs: Any) -> Iterable[TReturn]:
-        return tuple(fn(*args, **kwargs))
-
-    return inner
-
-
 @bytes_gen
 def putuvarint(x: int) -> Iterable[int]:
     """
@@ -93,122 +112,375 @@ def putuvarint(x: int) -> Iterable[int]:
     yield x
 
 
-def extract_meta(src: bytes) -> Tuple[int, int]:
+# The limit on decoded block lengths applied by calls that are not given a
+# max_length. See set_default_max_length.
+_default_max_length = DEFAULT_MAX_LENGTH
+
+
+def get_default_max_length() -> int:
+    """
+    Return the limit on decoded block lengths applied by calls that are not
+    given a max_length.
+    """
+    return _default_max_length
+
+
+def set_default_max_length(max_length: int) -> None:
+    """
+    Set the limit on decoded block lengths applied by every call that is not
+    given a max_length, from the next call on. It cannot be raised past
+    DEFAULT_MAX_LENGTH, the largest length the format allows.
+    """
+    global _default_max_length
+    if not 0 <= max_length <= DEFAULT_MAX_LENGTH:
+        raise ValueError(f"max_length must be between 0 and {DEFAULT_MAX_LENGTH}")
+    _default_max_length = max_length
+
+
+def extract_meta(src: BufferType, max_length: Optional[int] = None) -> Tuple[int, int]:
     """
     Return a 2-tuple:
 
     - the length of the decoded block
     - the number of bytes that the length header occupied.
+
+    Raises TooLargeError if the decoded block is longer than max_length, or
+    than the default set with set_default_max_length if max_length is None.
     """
+    if max_length is None:
+        max_length = _default_max_length
     value, num_bytes = uvarint(src)
     if num_bytes <= 0 or value > 0xFFFFFFFF:
         raise CorruptError
-    if value > 0x7FFFFFFF:
+    if value > DEFAULT_MAX_LENGTH or value > max_length:
         raise TooLargeError
     return value, num_bytes
 
 
-def decompress(buf: bytes) -> bytes:
+def check_block_length(
+    src_len: int, length_header_size: int, block_length: int
+) -> None:
+    """
+    Raise CorruptError if a block of src_len bytes cannot decode to
+    block_length bytes, so that a short block with a forged length header is
+    rejected before any memory is allocated for its output.
+    """
+    if (
+        block_length * MAX_EXPANSION_DENOMINATOR
+        > (src_len - length_header_size) * MAX_EXPANSION_NUMERATOR  # noqa: W503
+    ):
+        raise CorruptError
+
+
+def decompress(buf: BufferType, max_length: Optional[int] = None) -> bytes:
     """
     decompress returns the decompressed form of buf.
+
+    Raises TooLargeError, before allocating anything, if buf decodes to more
+    than max_length bytes.
     """
-    block_length, length_header_size = extract_meta(buf)
-    src = tuple(c for c in buf)
-    src_len = len(src)
-    dst = [0] * block_length
-    d, offset, length = 0, 0, 0
+    src = byte_view(buf)
+    block_length, length_header_size = extract_meta(src, max_length)
+    check_block_length(len(src), length_header_size, block_length)
+    # The decoded block is written into a single preallocated buffer; literal
+    # runs are copied in with slice assignment rather than rebuilding ``dst``.
+    dst = bytearray(block_length)
+    decompress_block(src, length_header_size, dst)
+    return bytes(dst)
+
+
+def decompress_into(
+    src: BufferType,
+    out: BufferType,
+    out_offset: int = 0,
+    max_length: Optional[int] = None,
+) -> int:
+    """
+    decompress_into writes the decompressed form of src into the writable
+    buffer out, starting at out_offset, and returns the number of bytes
+    written.
 
-    while length_header_size < src_len:
-        elem_type = src[length_header_size] & 0x03
-        if elem_type == TAG_LITERAL:
-            literal_length = src[length_header_size] >> 2
-
-            if literal_length < 60:
-                length_header_size += 1
-            elif literal_length == 60:
-                length_header_size += 2
-                if length_header_size > src_len:
-                    raise CorruptError
-                literal_length = src[length_header_size - 1]
-            elif literal_length == 61:
-                length_header_size += 3
-                if length_header_size > src_len:
-                    raise CorruptError
-                literal_length = src[length_header_size - 2] | (
-                    src[length_header_size - 1] << 8
-                )
-            elif literal_length == 62:
-                length_header_size += 4
-                if length_header_size > src_len:
-                    raise CorruptError
-                literal_length = (
-                    src[length_header_size - 3]
-                    | (src[length_header_size - 2] << 8)  # noqa: W503
-                    | (src[length_header_size - 1] << 16)  # noqa: W503
-                )
-            elif literal_length == 63:
-                length_header_size += 5
-                if length_header_size > src_len:
-                    raise CorruptError
-
-                literal_length = (
-                    src[length_header_size - 4]
-                    | (src[length_header_size - 3] << 8)  # noqa: W503
-                    | (src[length_header_size - 2] << 16)  # noqa: W503
-                    | (src[length_header_size - 1] << 24)  # noqa: W503
-                )
+    Raises TooLargeError if the decoded block does not fit in out or is longer
+    than max_length. If src is corrupt, out may have been partially written
+    before the error is raised.
+    """
+    src = byte_view(src)
+    block_length, length_header_size = extract_meta(src, max_length)
+    check_block_length(len(src), length_header_size, block_length)
+
+    view = memoryview(out)
+    if view.readonly:
+        raise TypeError("out must be a writable buffer")
+    if view.format != "B" or view.ndim != 1:
+        view = view.cast("B")
+    if out_offset < 0 or out_offset > len(view):
+        raise ValueError(f"out_offset {out_offset} is outside of out")
+    if block_length > len(view) - out_offset:
+        raise TooLargeError
 
-            length = literal_length + 1
+    decompress_block(
+        src,
+        length_header_size,
+        view[out_offset : out_offset + block_length],  # noqa: E203
+    )
+    return block_length
 
-            if length <= 0:
-                raise BaseSnappyError("Unsupported literal length")
-            if length > len(dst) - d or length > src_len - length_header_size:
-                raise CorruptError
 
-            dst = list(
-                itertools.chain(  # noqa: E203
-                    dst[:d],
-                    src[length_header_size : length_header_size + length],  # noqa: E203
-                    dst[d + length :],  # noqa: E203
-                )
-            )
+def tag_decoding(tag: int) -> Tuple[int, int, int]:
+    """
+    Return the tag type of the tag byte tag, the number of bytes taken by the
+    tag and the extra length or offset bytes that follow it, and the number
+    of bytes the element decodes to, or 0 for a literal whose length is
+    stored in the extra bytes.
+    """
+    elem_type = tag & 0x03
+    if elem_type == TAG_LITERAL:
+        literal_length = tag >> 2
+        if literal_length < 60:
+            return elem_type, 1, literal_length + 1
+        return elem_type, literal_length - 58, 0
+    if elem_type == TAG_COPY1:
+        return elem_type, 2, 4 + ((tag >> 2) & 0x7)
+    if elem_type == TAG_COPY2:
+        return elem_type, 3, 1 + (tag >> 2)
+    return elem_type, 5, 1 + (tag >> 2)
+
+
+# tag_decoding for every tag byte.
+TAG_DECODING = tuple(tag_decoding(tag) for tag in range(256))
+
+# One element of a compressed block: its tag type, the position just past
+# it, the number of bytes it decodes to, and the offset of a copy or 0 for a
+# literal.
+Element = Tuple[int, int, int, int]
+
+
+def iter_elements(
+    src: Union[bytes, bytearray, memoryview], pos: int
+) -> Iterator[Element]:
+    """
+    Yield the elements of src from position pos on, the end of its length
+    header. This is the one decoder of tags, shared by ``decompress_block``,
+    ``validate``, ``tags.iter_tags`` and ``decoder.BlockDecoder``, which each
+    check the elements against their own output position.
+
+    An element cut short by the end of src is yielded last, with an end past
+    len(src): with a length of 0 if its tag is incomplete, or, for a literal
+    whose data is incomplete, with its full length, so that its data starts
+    at end - length.
+    """
+    src_len = len(src)
+    decoding = TAG_DECODING
+    while pos < src_len:
+        tag = src[pos]
+        elem_type, tag_size, length = decoding[tag]
+        pos += tag_size
+        if pos > src_len:
+            yield elem_type, pos, 0, 0
+            return
+        if elem_type == TAG_COPY1:
+            yield elem_type, pos, length, ((tag & 0xE0) << 3) | src[pos - 1]
+        elif elem_type == TAG_COPY2:
+            yield elem_type, pos, length, src[pos - 2] | (src[pos - 1] << 8)
+        elif elem_type == TAG_LITERAL:
+            if not length:
+                length_bytes = src[pos - tag_size + 1 : pos]  # noqa: E203
+                length = int.from_bytes(length_bytes, "little") + 1
+            pos += length
+            yield elem_type, pos, length, 0
+        else:
+            offset = int.from_bytes(src[pos - 4 : pos], "little")  # noqa: E203
+            yield elem_type, pos, length, offset
+
+
+def decompress_block(
+    src: Union[bytes, bytearray, memoryview],
+    length_header_size: int,
+    dst: Union[bytearray, memoryview],
+) -> None:
+    """
+    Decode the elements of src that follow its length header into dst, which
+    must be exactly as long as the decoded block.
+    """
+    block_length = len(dst)
+    src_len = len(src)
+    d = 0
+
+    for elem_type, end, length, offset in iter_elements(src, length_header_size):
+        if end > src_len or length > block_length - d:
+            raise CorruptError
+
+        if elem_type == TAG_LITERAL:
+            dst[d : d + length] = src[end - length : end]  # noqa: E203
             d += length
-            length_header_size += length
             continue
 
-        elif elem_type == TAG_COPY1:
-            length_header_size += 2
-            if length_header_size > src_len:
-                raise CorruptError
-            length = 4 + ((src[length_header_size - 2] >> 2) & 0x7)
-            offset = ((src[length_header_size - 2] & 0xE0) << 3) | src[
-                length_header_size - 1
-            ]
+        if offset == 0 or offset > d:
+            raise CorruptError
+        end = d + length
+        if offset >= length:
+            # The source and destination ranges do not overlap.
+            dst[d:end] = dst[d - offset : end - offset]  # noqa: E203
+            d = end
+        else:
+            # The copy overlaps itself, which repeats the last `offset` bytes
+            # until `length` bytes have been written.
+            repeat = length // offset + 1
+            if isinstance(dst, memoryview):
+                # Slicing a memoryview does not copy, so take the pattern out.
+                pattern = dst[d - offset : d].tobytes()  # noqa: E203
+                dst[d:end] = (pattern * repeat)[:length]
+            else:
+                dst[d:end] = (dst[d - offset : d] * repeat)[:length]  # noqa: E203
+            d = end
 
-        elif elem_type == TAG_COPY2:
-            length_header_size += 3
-            if length_header_size > src_len:
-                raise CorruptError
-            length = 1 + (src[length_header_size - 3] >> 2)
-            offset = src[length_header_size - 2] | (src[length_header_size - 1] << 8)
+    if d != block_length:
+        raise CorruptError
 
-        elif elem_type == TAG_COPY4:
-            raise BaseSnappyError("Unsupported COPY_4 tag")
 
-        end = d + length
-        if offset > d or end > len(dst):
-            raise CorruptError
-        while d < end:
-            dst[d] = dst[d - offset]
-            d += 1
+def uncompressed_length(buf: BufferType) -> int:
+    """
+    uncompressed_length returns the length of the decompressed form of buf, as
+    given by its header, without decoding anything else.
+    """
+    block_length, _ = extract_meta(byte_view(buf))
+    return block_length
+
 
+def validate(buf: BufferType, max_length: Optional[int] = None) -> bool:
+    """
+    validate returns whether buf can be decompressed, without building the
+    decompressed output. It returns False exactly when ``decompress`` raises.
+    """
+    src = byte_view(buf)
+    try:
+        block_length, length_header_size = extract_meta(src, max_length)
+        check_block_length(len(src), length_header_size, block_length)
+        validate_block(src, length_header_size, block_length)
+    except BaseSnappyError:
+        return False
+    else:
+        return True
+
+
+def validate_block(
+    src: Union[bytes, bytearray, memoryview], length_header_size: int, block_length: int
+) -> None:
+    """
+    Walk the elements of src that follow its length header, raising the same
+    errors as ``decompress_block`` would for a block of block_length bytes.
+    """
+    src_len = len(src)
+    d = 0
+    for elem_type, end, length, offset in iter_elements(src, length_header_size):
+        if end > src_len or offset > d or (elem_type != TAG_LITERAL and not offset):
+            raise CorruptError
+        # The output position only ever grows, so a block that decodes past
+        # block_length is caught by the final check.
+        d += length
     if d != block_length:
         raise CorruptError
 
-    return bytes(dst[:d])
 
+# The number of elements in each batch of Tags yielded by iter_block_tags.
+DEFAULT_BATCH_SIZE = 1 << 16
+
+# The record of one element: its tag type, the position of its tag in the
+# compressed block, the number of bytes it decodes to, and the offset of a
+# copy or 0 for a literal.
+Tag = Tuple[int, int, int, int]
+
+
+class Tags:
+    """
+    A batch of consecutive elements of a compressed block, stored column by
+    column. Iterating over it yields Tag records.
+    """
+
+    __slots__ = ("kinds", "positions", "lengths", "offsets")
+
+    def __init__(self) -> None:
+        self.kinds: "array.array[int]" = array.array("B")
+        self.positions: "array.array[int]" = array.array("Q")
+        self.lengths: "array.array[int]" = array.array("L")
+        self.offsets: "array.array[int]" = array.array("L")
+
+    def __len__(self) -> int:
+        return len(self.kinds)
 
+    def __iter__(self) -> Iterator[Tag]:
+        return zip(self.kinds, self.positions, self.lengths, self.offsets)
+
+    def __getitem__(self, index: int) -> Tag:
+        return (
+            self.kinds[index],
+            self.positions[index],
+            self.lengths[index],
+            self.offsets[index],
+        )
+
+    def __repr__(self) -> str:
+        return f"<Tags of {len(self)} elements>"
+
+
+def iter_block_tags(
+    src: Union[bytes, bytearray, memoryview],
+    pos: int,
+    block_length: int,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[Tags]:
+    """
+    Yield the elements of src from position pos on, the end of its length
+    header, in batches of up to batch_size. Raise the same errors as
+    ``decompress_block`` would for a block of block_length bytes, once the
+    elements before the error have been yielded.
+    """
+    src_len = len(src)
+    d = 0
+    tags = Tags()
+    append_kind, append_position = tags.kinds.append, tags.positions.append
+    append_length, append_offset = tags.lengths.append, tags.offsets.append
+    count = 0
+
+    for elem_type, end, length, offset in iter_elements(src, pos):
+        if count == batch_size:
+            yield tags
+            tags = Tags()
+            append_kind, append_position = tags.kinds.append, tags.positions.append
+            append_length, append_offset = tags.lengths.append, tags.offsets.append
+            count = 0
+
+        if end > src_len:
+            raise CorruptError
+        if elem_type != TAG_LITERAL and (offset == 0 or offset > d):
+            raise CorruptError
+        d += length
+        if d > block_length:
+            raise CorruptError
+
+        append_kind(elem_type)
+        append_position(pos)
+        append_length(length)
+        append_offset(offset)
+        count += 1
+        pos = end
+
+    if d != block_length:
+        raise CorruptError
+    if count:
+        yield tags
+
+
+# Copies are only emitted for offsets below max_offset. The default keeps to
+# half of the window that COPY_2 tags can address; MAX_COPY2_OFFSET uses all of
+# it and larger windows, up to MAX_COPY4_OFFSET, also emit COPY_4 tags.
 MAX_OFFSET = 1 << 15
+MAX_COPY2_OFFSET = 1 << 16
+MAX_COPY4_OFFSET = 1 << 32
+
+# COPY_4 tags are 5 bytes long, so they are only worth emitting for matches of
+# at least 5 bytes. This is also what keeps max_encoded_len valid.
+MIN_COPY4_LENGTH = 5
 
 C240 = 60 << 2
 C244 = 61 << 2
@@ -218,35 +490,72 @@ C65536 = 1 << 16
 C4294967296 = 1 << 32
 
 
-@tuple_gen
-def emit_literal(lit: bytes) -> Iterable[int]:
-    """emit_literal returns a literal chunk."""
-    n = len(lit) - 1
+def max_encoded_len(src_len: int) -> int:
+    """
+    max_encoded_len returns the maximum length of a snappy block, given its
+    uncompressed length.
+    """
+    # Compressed data can be defined as:
+    #    compressed := item* literal*
+    #    item       := literal* copy
+    #
+    # The trailing literal sequence has a space blowup of at most 62/60
+    # since a literal of length 60 needs one tag byte + one extra byte
+    # for length information.
+    #
+    # Item blowup is trickier to measure. Suppose the "copy" op copies
+    # 4 bytes of data. Because of a special check in the encoding code,
+    # we produce a 4-byte copy only if the offset is < 65536. Therefore
+    # the copy op takes 3 bytes to encode, and this type of item leads
+    # to at most the 62/60 blowup for representing literals.
+    #
+    # Suppose the "copy" op copies 5 bytes of data. If the offset is big
+    # enough, it will take 5 bytes to encode the copy op. Therefore the
+    # worst case here is a one-byte literal followed by a five-byte copy.
+    # That is, 6 bytes of input turn into 7 bytes of "compressed" data.
+    #
+    # This last factor dominates the blowup, so the final estimate is:
+    return 32 + src_len + src_len // 6
+
+
+def emit_literal(dst: bytearray, d: int, lit: BufferType) -> int:
+    """
+    emit_literal writes a literal chunk into dst at position d and returns the
+    number of bytes written.
+    """
+    lit_len = len(lit)
+    n = lit_len - 1
 
     if n < 60:
-        yield (uint8(n) << 2) | TAG_LITERAL
+        dst[d] = (n << 2) | TAG_LITERAL
+        i = 1
     elif n < C240:
-        yield C240 | TAG_LITERAL
-        yield uint8(n)
+        dst[d] = C240 | TAG_LITERAL
+        dst[d + 1] = uint8(n)
+        i = 2
     elif n < C244:
-        yield C244 | TAG_LITERAL
-        yield uint8(n)
-        yield uint8(n >> 8)
+        dst[d] = C244 | TAG_LITERAL
+        dst[d + 1] = uint8(n)
+        dst[d + 2] = uint8(n >> 8)
+        i = 3
     elif n < C65536:
-        yield C248 | TAG_LITERAL
-        yield uint8(n)
-        yield uint8(n >> 8)
-        yield uint8(n >> 16)
+        dst[d] = C248 | TAG_LITERAL
+        dst[d + 1] = uint8(n)
+        dst[d + 2] = uint8(n >> 8)
+        dst[d + 3] = uint8(n >> 16)
+        i = 4
     elif uint64(n) < C4294967296:
-        yield C252 | TAG_LITERAL
-        yield uint8(n)
-        yield uint8(n >> 8)
-        yield uint8(n >> 16)
-        yield uint8(n >> 24)
+        dst[d] = C252 | TAG_LITERAL
+        dst[d + 1] = uint8(n)
+        dst[d + 2] = uint8(n >> 8)
+        dst[d + 3] = uint8(n >> 16)
+        dst[d + 4] = uint8(n >> 24)
+        i = 5
     else:
         raise BaseSnappyError("Source buffer is too long")
 
-    yield from lit
+    dst[d + i : d + i + lit_len] = lit  # noqa: E203
+    return i + lit_len
 
 
 C8 = 1 << 3
@@ -255,100 +564,459 @@ C256 = 1 << 8
 C2048 = 1 << 11
 
 
-@tuple_gen
-def emit_copy(offset: int, length: int) -> Iterable[int]:
-    """emit_copy writes a copy chunk and returns the number of bytes written."""
+def emit_copy4(dst: bytearray, d: int, offset: int, length: int) -> int:
+    """
+    emit_copy4 writes a single COPY_4 tag, of at most 64 bytes, into dst at
+    position d and returns the number of bytes written.
+    """
+    dst[d] = ((length - 1) << 2) | TAG_COPY4
+    dst[d + 1 : d + 5] = offset.to_bytes(4, "little")  # noqa: E203
+    return 5
+
+
+def emit_copy(dst: bytearray, d: int, offset: int, length: int) -> int:
+    """
+    emit_copy writes a copy chunk into dst at position d and returns the
+    number of bytes written.
+    """
+    i = 0
+    if offset >= C65536:
+        # Split long copies so that the last tag still copies at least 4
+        # bytes, like the reference encoder does.
+        while length >= 68:
+            i += emit_copy4(dst, d + i, offset, C64)
+            length -= C64
+        if length > C64:
+            i += emit_copy4(dst, d + i, offset, 60)
+            length -= 60
+        return i + emit_copy4(dst, d + i, offset, length)
+
     while length > 0:
         x = length - 4
         if 0 <= x and x < C8 and offset < C2048:
-            yield ((uint8(offset >> 8) & 0x07) << 5) | (uint8(x) << 2) | TAG_COPY1
-            yield uint8(offset)
+            dst[d + i] = ((uint8(offset >> 8) & 0x07) << 5) | (x << 2) | TAG_COPY1
+            dst[d + i + 1] = uint8(offset)
+            i += 2
             break
 
         x = length
         if x > C64:
             x = C64
-        yield (uint8(x - 1) << 2) | TAG_COPY2
-        yield uint8(offset)
-        yield uint8(offset >> 8)
+        dst[d + i] = ((x - 1) << 2) | TAG_COPY2
+        dst[d + i + 1] = uint8(offset)
+        dst[d + i + 2] = uint8(offset >> 8)
+        i += 3
         length -= x
+    return i
+
+
+# Reads the little-endian 32-bit word at a position of a buffer in one call.
+unpack_word = struct.Struct("<I").unpack_from
+
+
+def match_length(src: Union[bytes, bytearray, memoryview], i: int, j: int) -> int:
+    """
+    match_length returns the number of bytes that are equal in src from
+    positions i and j onwards, where j < i, comparing windows of 8 to 64
+    bytes at a time.
+    """
+    src_len = len(src)
+    if i == src_len or src[i] != src[j]:
+        # Most matches end within a few bytes, often right away.
+        return 0
+    start = i
+    step = 8
+    while i < src_len:
+        end = min(i + step, src_len)
+        window = src[i:end]
+        other = src[j : j + end - i]  # noqa: E203
+        if window != other:
+            # The lowest set bit of the difference of the little-endian
+            # words is in the first byte that differs.
+            diff = int.from_bytes(window, "little") ^ int.from_bytes(other, "little")
+            return i - start + (((diff & -diff).bit_length() - 1) >> 3)
+        j += end - i
+        i = end
+        if step < 64:
+            step *= 2
+    return i - start
 
 
 C24 = 32 - 8
 MAX_TABLE_SIZE = 1 << 14
 
+# Compression levels. Level 1 is the single-probe encoder below. Higher levels
+# trade speed for ratio: they map to the log2 of the largest hash table, the
+# number of hash chain candidates tried per position and whether one-step lazy
+# matching is used. All levels emit standard tags.
+MIN_LEVEL = 1
+DEFAULT_LEVEL = 1
+LEVEL_PARAMS = {2: (15, 4, True), 3: (16, 16, True), 4: (17, 64, True)}
+MAX_LEVEL = max(LEVEL_PARAMS)
 
-@bytes_gen
-def compress(buf: bytes) -> Iterable[int]:
-    """compress returns the compressed form of buf."""
-    src = tuple(buf)
-    src_len = len(src)
+# The size of the fragments that fragmented compression, like the reference
+# encoder, splits its input into.
+FRAGMENT_SIZE = 1 << 16
+
+
+# Output buffers larger than this are not kept by a Compressor between calls,
+# so that a single large input does not pin its worst-case output size.
+MAX_POOLED_OUTPUT_SIZE = 1 << 20
+
+
+class Compressor:
+    """
+    Compressor holds the hash table and output buffer of the encoder so that
+    they are reused across calls to ``compress`` instead of being allocated
+    for every message.
+
+    The hash table is never cleared: positions are stored in it shifted by the
+    number of bytes compressed by earlier calls, so that entries left over
+    from those calls read back as negative positions and are ignored.
+    """
 
-    # The block starts with the varint-encoded length of the decompressed bytes.
-    yield from (c for c in putuvarint(src_len))
+    __slots__ = ("_table", "_table_base", "_dst")
+
+    def __init__(self) -> None:
+        self._table = [0] * MAX_TABLE_SIZE
+        self._table_base = 1
+        self._dst = bytearray()
+
+    def compress(
+        self,
+        buf: BufferType,
+        max_offset: int = MAX_OFFSET,
+        level: int = DEFAULT_LEVEL,
+        fragmented: bool = False,
+    ) -> bytes:
+        """
+        compress returns the compressed form of buf. See ``compress_into`` for
+        max_offset, level and fragmented.
+        """
+        src = byte_view(buf)
+
+        # Reserve the worst-case output size up front. Tags and literals are
+        # written into it in place and only the used part is returned.
+        max_len = max_encoded_len(len(src))
+        dst = self._dst
+        if len(dst) < max_len:
+            dst = bytearray(max_len)
+            if max_len <= MAX_POOLED_OUTPUT_SIZE:
+                self._dst = dst
+
+        d = self.compress_into(src, dst, 0, max_offset, level, fragmented)
+        with memoryview(dst) as view:
+            return view[:d].tobytes()
+
+    def compress_into(
+        self,
+        buf: BufferType,
+        out: bytearray,
+        out_offset: int = 0,
+        max_offset: int = MAX_OFFSET,
+        level: int = DEFAULT_LEVEL,
+        fragmented: bool = False,
+    ) -> int:
+        """
+        compress_into writes the compressed form of buf into out, starting at
+        out_offset, and returns the number of bytes written. out is extended
+        first if it has less than ``max_encoded_len(len(buf))`` bytes of room.
+
+        Copies are emitted only for offsets below max_offset, which can be
+        anything up to MAX_COPY4_OFFSET. Offsets of 64 KiB and over are
+        encoded as COPY_4 tags.
+
+        level ranges from MIN_LEVEL to MAX_LEVEL. Levels above 1 search for
+        longer matches with hash chains and lazy matching, see LEVEL_PARAMS.
+
+        With fragmented set, buf is compressed as independent fragments of
+        FRAGMENT_SIZE bytes, like the reference encoder does: matches never
+        cross a fragment boundary and the match finder starts afresh for each
+        fragment, which bounds its working memory. Copies still honour
+        max_offset; pass MAX_COPY2_OFFSET to let them reach back to the start
+        of their fragment, as the reference encoder's do. Larger values make
+        no difference, since fragments fit in the COPY_2 window.
+        """
+        if not 0 < max_offset <= MAX_COPY4_OFFSET:
+            raise ValueError(f"max_offset must be between 1 and {MAX_COPY4_OFFSET}")
+        if not MIN_LEVEL <= level <= MAX_LEVEL:
+            raise ValueError(f"level must be between {MIN_LEVEL} and {MAX_LEVEL}")
+        src = byte_view(buf)
+        src_len = len(src)
+
+        shortfall = out_offset + max_encoded_len(src_len) - len(out)
+        if shortfall > 0:
+            out.extend(bytes(shortfall))
+        dst = out
+
+        # The block starts with the varint-encoded length of the decompressed
+        # bytes.
+        header = putuvarint(src_len)
+        d = out_offset + len(header)
+        dst[out_offset:d] = header
+
+        if not fragmented:
+            return self.compress_block(src, dst, d, max_offset, level) - out_offset
+        max_offset = min(max_offset, MAX_COPY2_OFFSET)
+        for start in range(0, src_len, FRAGMENT_SIZE):
+            fragment = src[start : start + FRAGMENT_SIZE]  # noqa: E203
+            d = self.compress_block(fragment, dst, d, max_offset, level)
+        return d - out_offset
+
+    def compress_block(
+        self,
+        src: Union[bytes, bytearray, memoryview],
+        dst: bytearray,
+        d: int,
+        max_offset: int,
+        level: int,
+    ) -> int:
+        """
+        compress_block writes the elements of the compressed form of src,
+        without a length header, into dst at position d and returns the new
+        position.
+        """
+        src_len = len(src)
+
+        # Return early if src is short.
+        if src_len <= 4:
+            if src_len != 0:
+                d += emit_literal(dst, d, src)
+            return d
+
+        if level > 1:
+            table_bits, chain_depth, lazy = LEVEL_PARAMS[level]
+            return compress_block_chained(
+                src, dst, d, max_offset, table_bits, chain_depth, lazy
+            )
+
+        # Initialize the hash table. Its size ranges from 1<<8 to 1<<14
+        # inclusive.
+        shift, table_size = C24, C256
+        while table_size < MAX_TABLE_SIZE and table_size < src_len:
+            shift -= 1
+            table_size *= 2
+        table = self._table
+        table_base = self._table_base
+        self._table_base = table_base + src_len
+
+        # Iterate over the source bytes.
+        iter_pos = 0  # The iterator position.
+        last_matching_hash_pos = 0  # The last position with the same hash as s.
+        literal_start_pos = 0  # The start position of any pending literal bytes.
+
+        # Heuristic match skipping: if 32 bytes are scanned with no matches
+        # found, start looking only at every other byte. If 32 more bytes are
+        # scanned (or skipped), look at every third byte, etc. When a match is
+        # found, immediately go back to looking at every byte. This is a small
+        # loss (~5% performance, ~0.1% density) for compressible data due to more
+        # bookkeeping, but for non-compressible data (such as JPEG) it's a huge
+        # win since the compressor quickly "realizes" the data is incompressible
+        # and doesn't bother looking for matches everywhere.
+        skip = 32
+
+        while iter_pos + 3 < src_len:
+            # Update the hash table.
+            word = unpack_word(src, iter_pos)
+            hash_bucket = ((word[0] * 0x1E35A7BD) & 0xFFFFFFFF) >> shift
+
+            # Shift the stored positions against table_base: add it on
+            # writes, subtract it on reads. Empty slots and slots written by
+            # earlier calls then read back as negative positions.
+            last_matching_hash_pos = table[hash_bucket] - table_base
+            table[hash_bucket] = iter_pos + table_base
+
+            if (
+                last_matching_hash_pos < 0
+                or iter_pos - last_matching_hash_pos >= max_offset  # noqa: W503
+                or unpack_word(src, last_matching_hash_pos) != word  # noqa: W503
+            ):
+                # If t is invalid or src[s:s+4] differs from src[t:t+4], accumulate
+                # the skipped bytes into the pending literal.
+                iter_pos += skip >> 5
+                skip += skip >> 5
+                continue
+
+            # Otherwise, we have a match. Extend it to be as long as possible.
+            s0 = iter_pos
+            length = 4 + match_length(src, iter_pos + 4, last_matching_hash_pos + 4)
+            iter_pos += length
+            last_matching_hash_pos += length
+
+            if (
+                iter_pos - s0 < MIN_COPY4_LENGTH
+                and iter_pos - last_matching_hash_pos >= C65536  # noqa: W503
+            ):
+                # Too short to pay for a COPY_4 tag.
+                iter_pos = s0 + (skip >> 5)
+                skip += skip >> 5
+                continue
+
+            # Emit any pending literal bytes, then the copied bytes.
+            if literal_start_pos != s0:
+                d += emit_literal(dst, d, src[literal_start_pos:s0])
+            d += emit_copy(dst, d, iter_pos - last_matching_hash_pos, iter_pos - s0)
+            literal_start_pos = iter_pos
+            skip = 32
+
+            # As in the reference encoder, also hash the last byte of the
+            # match so that a match starting just before iter_pos can be
+            # found on the next iteration.
+            if iter_pos + 2 < src_len:
+                hash_code = unpack_word(src, iter_pos - 1)[0]
+                table[((hash_code * 0x1E35A7BD) & 0xFFFFFFFF) >> shift] = (
+                    iter_pos - 1 + table_base
+                )
+
+        # Emit any final pending literal bytes and return.
+        if literal_start_pos != src_len:
+            d += emit_literal(dst, d, src[literal_start_pos:])
+
+        return d
 
-    # Return early if src is short.
-    if src_len <= 4:
-        if src_len != 0:
-            yield from emit_literal(src)
-        return
 
-    # Initialize the hash table. Its size ranges from 1<<8 to 1<<14 inclusive.
-    shift, table_size = C24, C256
-    while table_size < MAX_TABLE_SIZE and table_size < src_len:
+def compress_block_chained(
+    src: Union[bytes, bytearray, memoryview],
+    dst: bytearray,
+    d: int,
+    max_offset: int,
+    table_bits: int,
+    chain_depth: int,
+    lazy: bool,
+) -> int:
+    """
+    Write the elements of the compressed form of src, which must be longer
+    than 4 bytes, into dst at position d and return the new position.
+
+    Every position is linked into a hash chain, and up to chain_depth earlier
+    positions with the same hash are tried to find the longest match. With
+    lazy set, a match is given up for one found at the next position when
+    that one is longer.
+    """
+    src_len = len(src)
+
+    # The hash table holds 1 + the last position of each hash, 0 when empty.
+    # prev links each position to the previous one with the same hash; it
+    # only needs to cover max_offset positions, or the whole of src.
+    shift, table_size = 32, 1
+    while table_size < (1 << table_bits) and table_size < src_len:
         shift -= 1
         table_size *= 2
-    table = [0] * MAX_TABLE_SIZE
-
-    # Iterate over the source bytes.
-    iter_pos = 0  # The iterator position.
-    last_matching_hash_pos = 0  # The last position with the same hash as s.
-    literal_start_pos = 0  # The start position of any pending literal bytes.
-
-    while iter_pos + 3 < src_len:
-        # Update the hash table.
-        b0, b1, b2, b3 = src[iter_pos : iter_pos + 4]  # noqa: E203
-        hash_code = (
-            uint32(b0) | (uint32(b1) << 8) | (uint32(b2) << 16) | (uint32(b3) << 24)
-        )
-        hash_bucket = uint32(hash_code * 0x1E35A7BD) >> shift
-
-        # We need to to store values in [-1, inf) in table. To save
-        # some initialization time, (re)use the table's zero value
-        # and shift the values against this zero: add 1 on writes,
-        # subtract 1 on reads.
-        last_matching_hash_pos = table[hash_bucket] - 1
-        table[hash_bucket] = iter_pos
-
-        if (
-            last_matching_hash_pos < 0
-            or iter_pos - last_matching_hash_pos >= MAX_OFFSET  # noqa: W503
-            or b0 != src[last_matching_hash_pos]  # noqa: W503
-            or b1 != src[last_matching_hash_pos + 1]  # noqa: W503
-            or b2 != src[last_matching_hash_pos + 2]  # noqa: W503
-            or b3 != src[last_matching_hash_pos + 3]  # noqa: W503
-        ):
-            # If t is invalid or src[s:s+4] differs from src[t:t+4], accumulate a literal byte.
-            iter_pos += 1
+    head = [0] * table_size
+    window = 1
+    while window < max_offset and window < src_len:
+        window *= 2
+    mask = window - 1
+    prev = [0] * window
+
+    # Positions past this cannot start a 4 byte match.
+    last_pos = src_len - 4
+    next_insert = 0
+
+    def insert_until(end: int) -> None:
+        nonlocal next_insert
+        pos = next_insert
+        while pos < end:
+            word = unpack_word(src, pos)[0]
+            hash_bucket = ((word * 0x1E35A7BD) & 0xFFFFFFFF) >> shift
+            prev[pos & mask] = head[hash_bucket]
+            head[hash_bucket] = pos + 1
+            pos += 1
+        if pos > next_insert:
+            next_insert = pos
+
+    def find_match(pos: int) -> Tuple[int, int]:
+        """
+        Return the length and offset of the longest match for pos found in
+        its hash chain, or (0, 0). Positions up to pos must be inserted.
+        """
+        best_length, best_offset = 0, 0
+        candidate = prev[pos & mask] - 1
+        limit = src_len - pos
+        for _ in range(chain_depth):
+            offset = pos - candidate
+            if candidate < 0 or offset >= max_offset:
+                break
+            # Only candidates that beat the best match so far are extended,
+            # past the prefix they are known to share with pos.
+            known = best_length + 1 if best_length else 4
+            end = candidate + known
+            if (
+                known <= limit
+                and src[end - 1] == src[pos + known - 1]  # noqa: W503
+                and src[candidate:end] == src[pos : pos + known]  # noqa: E203, W503
+            ):
+                length = known + match_length(src, pos + known, candidate + known)
+                if length > best_length and (
+                    length >= MIN_COPY4_LENGTH or (length >= 4 and offset < C65536)
+                ):
+                    best_length, best_offset = length, offset
+                    if length == limit:
+                        break
+            next_candidate = prev[candidate & mask] - 1
+            if next_candidate >= candidate:
+                break
+            candidate = next_candidate
+        return best_length, best_offset
+
+    pos = 0
+    literal_start_pos = 0
+    skip = 32
+    while pos <= last_pos:
+        # Insert pos ahead of the search so that it is found as the head of
+        # its chain; find_match starts from its predecessor.
+        insert_until(pos + 1)
+        length, offset = find_match(pos)
+        if not length:
+            # Skipped positions are not inserted either, so that
+            # incompressible data is passed over quickly, as in level 1.
+            pos += skip >> 5
+            skip += skip >> 5
+            next_insert = pos
             continue
 
-        elif literal_start_pos != iter_pos:
-            # Otherwise, we have a match. First, emit any pending literal bytes.
-            yield from emit_literal(src[literal_start_pos:iter_pos])
+        if lazy and pos < last_pos:
+            insert_until(pos + 2)
+            next_length, next_offset = find_match(pos + 1)
+            if next_length > length:
+                pos += 1
+                length, offset = next_length, next_offset
+
+        if literal_start_pos != pos:
+            d += emit_literal(dst, d, src[literal_start_pos:pos])
+        d += emit_copy(dst, d, offset, length)
+        pos += length
+        literal_start_pos = pos
+        skip = 32
+        insert_until(min(pos, last_pos + 1))
 
-        # Extend the match to be as long as possible.
-        s0 = iter_pos
-        iter_pos = iter_pos + 4
-        last_matching_hash_pos = last_matching_hash_pos + 4
+    if literal_start_pos != src_len:
+        d += emit_literal(dst, d, src[literal_start_pos:])
+    return d
 
-        while iter_pos < src_len and src[iter_pos] == src[last_matching_hash_pos]:
-            iter_pos += 1
-            last_matching_hash_pos += 1
 
-        # Emit the copied bytes.
-        yield from emit_copy(iter_pos - last_matching_hash_pos, iter_pos - s0)
-        literal_start_pos = iter_pos
+_local = threading.local()
 
-    # Emit any final pending literal bytes and return.
-    if literal_start_pos != src_len:
-        yield from emit_literal(src[literal_start_pos:])
+
+def get_compressor() -> Compressor:
+    """
+    Return the Compressor reserved for the calling thread.
+    """
+    try:
+        return _local.compressor  # type: ignore
+    except AttributeError:
+        compressor = _local.compressor = Compressor()
+        return compressor
+
+
+def compress(
+    buf: BufferType,
+    max_offset: int = MAX_OFFSET,
+    level: int = DEFAULT_LEVEL,
+    fragmented: bool = False,
+) -> bytes:
+    """
+    compress returns the compressed form of buf. See ``Compressor.compress_into``
+    for max_offset, level and fragmented.
+    """
+    return get_compressor().compress(buf, max_offset, level, fragmented)
@@ -0,0 +1,273 @@
+import collections
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+import os
+from typing import Any, Callable, Deque, Iterable, Iterator, Optional, Union, cast
+
+from .constants import (
+    CHUNK_HEADER_SIZE,
+    MAX_UNCOMPRESSED_CHUNK_LEN,
+    STREAM_IDENTIFIER_CHUNK,
+)
+from .exceptions import CorruptError
+from .framing import StreamDecompressor, encode_chunk
+from .main import BufferType, byte_view
+
+
+# The input of the parallel functions: a buffer, or an iterable of buffers
+# holding the input piece by piece, such as the windows of a file being read.
+InputType = Union[BufferType, Iterable[BufferType]]
+
+# Chunks are handed to workers in batches to amortize the cost of shipping
+# them between processes. Compression batches always hold a whole number of
+# 64 KiB framing chunks.
+DEFAULT_TASK_SIZE = 16 * MAX_UNCOMPRESSED_CHUNK_LEN
+
+
+def _compress_task(data: bytes) -> bytes:
+    """
+    Return the framed chunks for data, without a stream identifier.
+    """
+    view = memoryview(data)
+    return b"".join(
+        encode_chunk(view[start : start + MAX_UNCOMPRESSED_CHUNK_LEN])  # noqa: E203
+        for start in range(0, len(view), MAX_UNCOMPRESSED_CHUNK_LEN)
+    )
+
+
+def _decompress_task(data: bytes, verify_checksums: bool) -> bytes:
+    """
+    Return the uncompressed data of a run of whole framed chunks.
+    """
+    decompressor = StreamDecompressor(verify_checksums)
+    decompressor.decompress(STREAM_IDENTIFIER_CHUNK)
+    result = decompressor.decompress(data)
+    decompressor.flush()
+    return result
+
+
+def _memoryview(buf: BufferType) -> memoryview:
+    view = byte_view(buf)
+    return view if isinstance(view, memoryview) else memoryview(view)
+
+
+def _windows(data: InputType, task_size: int) -> Iterator[memoryview]:
+    """
+    Return the pieces of data as byte views: data itself in task_size slices
+    if it is a buffer, or each buffer of data in turn if it is an iterable.
+    """
+    try:
+        view = _memoryview(cast(BufferType, data))
+    except TypeError:
+        return (_memoryview(window) for window in cast(Iterable[BufferType], data))
+    starts = range(0, len(view), task_size)
+    return (view[start : start + task_size] for start in starts)  # noqa: E203
+
+
+def _take(pending: bytearray, size: int) -> bytes:
+    """
+    Remove the first size bytes of pending and return them.
+    """
+    with memoryview(pending) as view:
+        result = bytes(view[:size])
+    del pending[:size]
+    return result
+
+
+def _split_data(windows: Iterable[memoryview], task_size: int) -> Iterator[bytes]:
+    """
+    Split the data in windows into tasks of task_size bytes, and a shorter
+    final one. Only data that straddles windows is copied more than once.
+    """
+    pending = bytearray()
+    for window in windows:
+        if pending:
+            take = task_size - len(pending)
+            pending += window[:take]
+            window = window[take:]
+            if len(pending) < task_size:
+                continue
+            yield _take(pending, task_size)
+        whole = len(window) - len(window) % task_size
+        for start in range(0, whole, task_size):
+            yield bytes(window[start : start + task_size])  # noqa: E203
+        pending += window[whole:]
+    if pending:
+        yield bytes(pending)
+
+
+def _split_chunks(windows: Iterable[memoryview], task_size: int) -> Iterator[bytes]:
+    """
+    Split the framed stream in windows, past its stream identifier, into runs
+    of whole chunks holding roughly task_size bytes each.
+    """
+    identifier_len = len(STREAM_IDENTIFIER_CHUNK)
+    pending = bytearray()
+    identified = False
+    pos = 0
+    for window in windows:
+        pending += window
+        if not identified:
+            if len(pending) < identifier_len:
+                continue
+            if pending[:identifier_len] != STREAM_IDENTIFIER_CHUNK:
+                break
+            del pending[:identifier_len]
+            identified = True
+
+        pending_len = len(pending)
+        while pos + CHUNK_HEADER_SIZE <= pending_len:
+            chunk_len = (
+                pending[pos + 1] | (pending[pos + 2] << 8) | (pending[pos + 3] << 16)
+            )
+            end = pos + CHUNK_HEADER_SIZE + chunk_len
+            if end > pending_len:
+                break
+            pos = end
+            if pos >= task_size:
+                yield _take(pending, pos)
+                pending_len -= pos
+                pos = 0
+
+    if pending and not identified:
+        raise CorruptError("Snappy stream does not start with a stream identifier")
+    if pending:
+        # Whatever is left is either a partial header or a truncated chunk;
+        # the worker decoding it reports the stream as corrupt.
+        yield bytes(pending)
+
+
+def _map_ordered(
+    executor: Executor,
+    fn: Callable[..., bytes],
+    tasks: Iterable[Any],
+    max_in_flight: int,
+    *args: Any,
+) -> Iterator[bytes]:
+    """
+    Run fn over tasks on executor and yield the results in order, with at
+    most max_in_flight tasks submitted but not yet consumed.
+    """
+    pending: Deque["Future[bytes]"] = collections.deque()
+    try:
+        for task in tasks:
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+            pending.append(executor.submit(fn, task, *args))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _run(
+    executor: Optional[Executor],
+    max_workers: Optional[int],
+    max_in_flight: Optional[int],
+    fn: Callable[..., bytes],
+    tasks: Iterable[Any],
+    *args: Any,
+) -> Iterator[bytes]:
+    if max_in_flight is None:
+        max_in_flight = 2 * (max_workers or os.cpu_count() or 1)
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1")
+
+    if executor is not None:
+        yield from _map_ordered(executor, fn, tasks, max_in_flight, *args)
+    else:
+        with ProcessPoolExecutor(max_workers) as pool:
+            yield from _map_ordered(pool, fn, tasks, max_in_flight, *args)
+
+
+def iter_compress_parallel(
+    buf: InputType,
+    executor: Optional[Executor] = None,
+    max_workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    task_size: int = DEFAULT_TASK_SIZE,
+) -> Iterator[bytes]:
+    """
+    Compress buf into the snappy framing format on a pool of worker
+    processes, yielding the stream piece by piece, in order.
+
+    buf is either a buffer or an iterable of buffers that are compressed as
+    one stream, so that input can be read as it is compressed. It is split at
+    64 KiB chunk boundaries into tasks of task_size bytes, with at most
+    max_in_flight tasks dispatched ahead of the consumer. When no executor is
+    given, a ProcessPoolExecutor with max_workers workers is used. The stream
+    is identical to the one produced by StreamCompressor.
+    """
+    if task_size < MAX_UNCOMPRESSED_CHUNK_LEN or task_size % MAX_UNCOMPRESSED_CHUNK_LEN:
+        raise ValueError("task_size must be a multiple of 64 KiB")
+
+    yield STREAM_IDENTIFIER_CHUNK
+    yield from _run(
+        executor,
+        max_workers,
+        max_in_flight,
+        _compress_task,
+        _split_data(_windows(buf, task_size), task_size),
+    )
+
+
+def iter_decompress_parallel(
+    buf: InputType,
+    executor: Optional[Executor] = None,
+    max_workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    task_size: int = DEFAULT_TASK_SIZE,
+    verify_checksums: bool = True,
+) -> Iterator[bytes]:
+    """
+    Decompress the snappy framing format stream buf on a pool of worker
+    processes, yielding the uncompressed data piece by piece, in order.
+
+    buf is either a buffer or an iterable of buffers holding the stream piece
+    by piece. The stream is split into runs of whole chunks of roughly
+    task_size bytes. Errors are the same as those raised by StreamDecompressor.
+    """
+    yield from _run(
+        executor,
+        max_workers,
+        max_in_flight,
+        _decompress_task,
+        _split_chunks(_windows(buf, task_size), task_size),
+        verify_checksums,
+    )
+
+
+def compress_parallel(
+    buf: InputType,
+    executor: Optional[Executor] = None,
+    max_workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    task_size: int = DEFAULT_TASK_SIZE,
+) -> bytes:
+    """
+    Return the snappy framing format stream for buf, compressed on a pool of
+    worker processes. See ``iter_compress_parallel``.
+    """
+    return b"".join(
+        iter_compress_parallel(buf, executor, max_workers, max_in_flight, task_size)
+    )
+
+
+def decompress_parallel(
+    buf: InputType,
+    executor: Optional[Executor] = None,
+    max_workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    task_size: int = DEFAULT_TASK_SIZE,
+    verify_checksums: bool = True,
+) -> bytes:
+    """
+    Return the uncompressed data of the snappy framing format stream buf,
+    decompressed on a pool of worker processes. See
+    ``iter_decompress_parallel``.
+    """
+    return b"".join(
+        iter_decompress_parallel(
+            buf, executor, max_workers, max_in_flight, task_size, verify_checksums
+        )
+    )
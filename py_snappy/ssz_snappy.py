@@ -0,0 +1,169 @@
+# Implementation of the ``ssz_snappy`` encoding used by the Ethereum consensus
+# layer req/resp protocol: the uvarint length of the uncompressed payload,
+# followed by the payload in the snappy framing format.
+from typing import Optional, Union
+
+from .exceptions import CorruptError, TooLargeError
+from .framing import StreamCompressor, StreamDecompressor
+from .main import BufferType, byte_view, get_default_max_length, putuvarint, uvarint
+
+
+# The length prefix of a 64-bit value never needs more than 10 bytes.
+MAX_LENGTH_PREFIX_SIZE = 10
+
+
+class SszSnappyCompressor:
+    """
+    Incrementally encode a payload of a known length as ``ssz_snappy``.
+
+    The payload can be passed to ``add_chunk`` in pieces. Passing more or,
+    by the time ``flush`` is called, fewer than length bytes is a ValueError.
+    """
+
+    def __init__(self, length: int) -> None:
+        if length < 0:
+            raise ValueError("length must not be negative")
+        self._length = length
+        self._remaining = length
+        self._compressor = StreamCompressor()
+        self._prefix = putuvarint(length)
+
+    def add_chunk(self, data: BufferType) -> bytes:
+        """
+        Return the encoded form of data, preceded by the length prefix on the
+        first call.
+        """
+        src = byte_view(data)
+        if len(src) > self._remaining:
+            raise ValueError(
+                f"Payload is longer than its declared length {self._length}"
+            )
+        self._remaining -= len(src)
+        prefix, self._prefix = self._prefix, b""
+        return prefix + self._compressor.add_chunk(src)
+
+    compress = add_chunk
+
+    def flush(self) -> bytes:
+        """
+        Return any data still needed to complete the encoding.
+        """
+        if self._remaining:
+            raise ValueError(
+                f"Payload is shorter than its declared length {self._length}"
+            )
+        prefix, self._prefix = self._prefix, b""
+        return prefix + self._compressor.flush()
+
+
+class SszSnappyDecompressor:
+    """
+    Incrementally decode a payload encoded as ``ssz_snappy``.
+
+    Declared lengths over max_length are rejected with TooLargeError as soon
+    as the length prefix is read. The stream itself is rejected as soon as a
+    chunk would take the payload past its declared length, before that chunk
+    is decoded, so at most one chunk of input is ever buffered. A stream that
+    ends short of the declared length is reported by ``flush``.
+    """
+
+    def __init__(
+        self, max_length: Optional[int] = None, verify_checksums: bool = True
+    ) -> None:
+        self._prefix = bytearray()
+        self._length = -1
+        self._max_length = max_length
+        self._verify_checksums = verify_checksums
+        self._decompressor = StreamDecompressor(verify_checksums)
+        self._output_length = 0
+
+    @property
+    def length(self) -> int:
+        """
+        The declared length of the payload, or -1 if the length prefix has not
+        been read yet.
+        """
+        return self._length
+
+    def decompress(self, data: BufferType) -> bytes:
+        """
+        Return the payload data completed by data.
+        """
+        src = byte_view(data)
+        if self._length < 0:
+            src = self._read_prefix(src)
+            if self._length < 0:
+                return b""
+
+        decompressor = self._decompressor
+        try:
+            output = decompressor.decompress(src)
+        except TooLargeError:
+            if decompressor.output_length <= self._length:
+                raise
+            raise CorruptError(
+                f"Snappy stream is longer than its declared length {self._length}"
+            ) from None
+        self._output_length += len(output)
+        return output
+
+    def flush(self) -> bytes:
+        """
+        Check that the stream is complete and holds exactly the declared
+        length of payload.
+        """
+        if self._length < 0:
+            raise CorruptError("ssz_snappy length prefix is truncated")
+        self._decompressor.flush()
+        if self._output_length != self._length:
+            raise CorruptError(
+                f"Snappy stream is shorter than its declared length {self._length}"
+            )
+        return b""
+
+    def _read_prefix(
+        self, src: Union[bytes, bytearray, memoryview]
+    ) -> Union[bytes, bytearray, memoryview]:
+        """
+        Buffer the length prefix from the start of src and return what
+        follows it.
+        """
+        buffered = len(self._prefix)
+        self._prefix += src[: MAX_LENGTH_PREFIX_SIZE - buffered]
+        value, num_bytes = uvarint(self._prefix)
+        if num_bytes == 0 and len(self._prefix) < MAX_LENGTH_PREFIX_SIZE:
+            return b""
+        if num_bytes <= 0:
+            raise CorruptError("Invalid ssz_snappy length prefix")
+        max_length = self._max_length
+        if max_length is None:
+            max_length = get_default_max_length()
+        if value > max_length:
+            raise TooLargeError(
+                f"ssz_snappy payload length {value} is more than {max_length}"
+            )
+
+        self._length = value
+        self._decompressor = StreamDecompressor(self._verify_checksums, value)
+        del self._prefix[:]
+        return src[num_bytes - buffered :]  # noqa: E203
+
+
+def compress_ssz_snappy(buf: BufferType) -> bytes:
+    """
+    Return the ``ssz_snappy`` encoding of buf.
+    """
+    src = byte_view(buf)
+    compressor = SszSnappyCompressor(len(src))
+    return compressor.add_chunk(src) + compressor.flush()
+
+
+def decompress_ssz_snappy(buf: BufferType, max_length: Optional[int] = None) -> bytes:
+    """
+    Return the payload of the ``ssz_snappy`` encoded buf, which must hold the
+    whole encoding and nothing else.
+    """
+    decompressor = SszSnappyDecompressor(max_length)
+    output = decompressor.decompress(buf)
+    decompressor.flush()
+    return output
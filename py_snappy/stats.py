@@ -0,0 +1,300 @@
+# Instrumented compression and decompression. These run separate copies of
+# the code paths in main that record what the encoder and decoder did into a
+# CompressionStats, so that the uninstrumented paths carry no bookkeeping at
+# all. Element counts and histograms are taken from the elements of the
+# compressed block given by ``tags.iter_tags``; hash table statistics are
+# counted by a copy of the level 1 encoder.
+import collections
+import time
+from typing import Any, Counter, DefaultDict, Dict, Optional, Union
+
+from .constants import TAG_COPY1, TAG_COPY2, TAG_COPY4, TAG_LITERAL
+from .main import (
+    C24,
+    C256,
+    C65536,
+    DEFAULT_LEVEL,
+    MAX_OFFSET,
+    MAX_TABLE_SIZE,
+    MIN_COPY4_LENGTH,
+    BufferType,
+    Compressor,
+    Tags,
+    byte_view,
+    check_block_length,
+    decompress_block,
+    emit_copy,
+    emit_literal,
+    extract_meta,
+    match_length,
+    max_encoded_len,
+    unpack_word,
+)
+from .tags import iter_tags
+
+
+class CompressionStats:
+    """
+    Counters describing the blocks passed through ``compress_with_stats`` and
+    ``decompress_with_stats``. The counters add up over every call the object
+    is passed to.
+
+    match_lengths counts copy elements by length. offsets counts them by the
+    bit length of their offset, so key k counts offsets in [2**(k-1), 2**k).
+
+    Each probe of the level 1 encoder hash table is counted once, as a hit if
+    the slot holds an earlier position within the window that starts with
+    the same 4 bytes, a collision if it holds one that does not, or as empty
+    or out of window. Other levels do not record hash table statistics.
+
+    phase_times holds the wall time spent in each phase of the calls, in
+    seconds: "setup", "encode" and "output" for compression, "header",
+    "decode" and "output" for decompression.
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.uncompressed_bytes = 0
+        self.compressed_bytes = 0
+        self.literal_count = 0
+        self.literal_bytes = 0
+        self.copy1_count = 0
+        self.copy2_count = 0
+        self.copy4_count = 0
+        self.copy_bytes = 0
+        self.match_lengths: Counter[int] = Counter()
+        self.offsets: Counter[int] = Counter()
+        self.hash_probes = 0
+        self.hash_hits = 0
+        self.hash_collisions = 0
+        self.hash_empty = 0
+        self.hash_out_of_window = 0
+        self.phase_times: DefaultDict[str, float] = collections.defaultdict(float)
+
+    @property
+    def copy_count(self) -> int:
+        return self.copy1_count + self.copy2_count + self.copy4_count
+
+    @property
+    def collision_rate(self) -> float:
+        """
+        The fraction of hash table probes that found a colliding position.
+        """
+        return self.hash_collisions / self.hash_probes if self.hash_probes else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Return the counters as a dictionary, for logging or serialization.
+        """
+        return {
+            "calls": self.calls,
+            "uncompressed_bytes": self.uncompressed_bytes,
+            "compressed_bytes": self.compressed_bytes,
+            "literal_count": self.literal_count,
+            "literal_bytes": self.literal_bytes,
+            "copy1_count": self.copy1_count,
+            "copy2_count": self.copy2_count,
+            "copy4_count": self.copy4_count,
+            "copy_bytes": self.copy_bytes,
+            "match_lengths": dict(sorted(self.match_lengths.items())),
+            "offsets": dict(sorted(self.offsets.items())),
+            "hash_probes": self.hash_probes,
+            "hash_hits": self.hash_hits,
+            "hash_collisions": self.hash_collisions,
+            "hash_empty": self.hash_empty,
+            "hash_out_of_window": self.hash_out_of_window,
+            "collision_rate": self.collision_rate,
+            "phase_times": dict(self.phase_times),
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"CompressionStats(calls={self.calls}, "
+            f"uncompressed_bytes={self.uncompressed_bytes}, "
+            f"compressed_bytes={self.compressed_bytes}, "
+            f"literal_bytes={self.literal_bytes}, copy_bytes={self.copy_bytes}, "
+            f"copy_count={self.copy_count}, collision_rate={self.collision_rate:.3f})"
+        )
+
+
+def record_tags(stats: CompressionStats, tags: Tags) -> None:
+    """
+    Add a batch of elements of a block to stats.
+    """
+    kinds = tags.kinds
+    literal_bytes = copy_bytes = 0
+    match_lengths = stats.match_lengths
+    offsets = stats.offsets
+    for kind, length, offset in zip(kinds, tags.lengths, tags.offsets):
+        if kind == TAG_LITERAL:
+            literal_bytes += length
+        else:
+            copy_bytes += length
+            match_lengths[length] += 1
+            offsets[offset.bit_length()] += 1
+
+    stats.literal_count += kinds.count(TAG_LITERAL)
+    stats.literal_bytes += literal_bytes
+    stats.copy1_count += kinds.count(TAG_COPY1)
+    stats.copy2_count += kinds.count(TAG_COPY2)
+    stats.copy4_count += kinds.count(TAG_COPY4)
+    stats.copy_bytes += copy_bytes
+
+
+class CountingCompressor(Compressor):
+    """
+    A Compressor whose level 1 encoder counts its hash table probes into
+    stats. Its output is the same as that of Compressor.
+    """
+
+    __slots__ = ("stats",)
+
+    def __init__(self, stats: CompressionStats) -> None:
+        super().__init__()
+        self.stats = stats
+
+    def compress_block(
+        self,
+        src: Union[bytes, bytearray, memoryview],
+        dst: bytearray,
+        d: int,
+        max_offset: int,
+        level: int,
+    ) -> int:
+        src_len = len(src)
+        if src_len <= 4 or level > 1:
+            return super().compress_block(src, dst, d, max_offset, level)
+
+        # This is Compressor.compress_block with counters added, see there.
+        shift, table_size = C24, C256
+        while table_size < MAX_TABLE_SIZE and table_size < src_len:
+            shift -= 1
+            table_size *= 2
+        table = self._table
+        table_base = self._table_base
+        self._table_base = table_base + src_len
+
+        iter_pos = 0
+        last_matching_hash_pos = 0
+        literal_start_pos = 0
+        skip = 32
+        probes = hits = collisions = empty = out_of_window = 0
+
+        while iter_pos + 3 < src_len:
+            word = unpack_word(src, iter_pos)
+            hash_bucket = ((word[0] * 0x1E35A7BD) & 0xFFFFFFFF) >> shift
+            last_matching_hash_pos = table[hash_bucket] - table_base
+            table[hash_bucket] = iter_pos + table_base
+            probes += 1
+
+            if last_matching_hash_pos < 0:
+                empty += 1
+            elif iter_pos - last_matching_hash_pos >= max_offset:
+                out_of_window += 1
+            elif unpack_word(src, last_matching_hash_pos) != word:
+                collisions += 1
+            else:
+                hits += 1
+                s0 = iter_pos
+                length = 4 + match_length(src, iter_pos + 4, last_matching_hash_pos + 4)
+                iter_pos += length
+                last_matching_hash_pos += length
+
+                if (
+                    iter_pos - s0 < MIN_COPY4_LENGTH
+                    and iter_pos - last_matching_hash_pos >= C65536  # noqa: W503
+                ):
+                    iter_pos = s0 + (skip >> 5)
+                    skip += skip >> 5
+                    continue
+
+                if literal_start_pos != s0:
+                    d += emit_literal(dst, d, src[literal_start_pos:s0])
+                d += emit_copy(dst, d, iter_pos - last_matching_hash_pos, iter_pos - s0)
+                literal_start_pos = iter_pos
+                skip = 32
+
+                if iter_pos + 2 < src_len:
+                    hash_code = unpack_word(src, iter_pos - 1)[0]
+                    table[((hash_code * 0x1E35A7BD) & 0xFFFFFFFF) >> shift] = (
+                        iter_pos - 1 + table_base
+                    )
+                continue
+
+            iter_pos += skip >> 5
+            skip += skip >> 5
+
+        if literal_start_pos != src_len:
+            d += emit_literal(dst, d, src[literal_start_pos:])
+
+        stats = self.stats
+        stats.hash_probes += probes
+        stats.hash_hits += hits
+        stats.hash_collisions += collisions
+        stats.hash_empty += empty
+        stats.hash_out_of_window += out_of_window
+        return d
+
+
+def compress_with_stats(
+    buf: BufferType,
+    stats: CompressionStats,
+    max_offset: int = MAX_OFFSET,
+    level: int = DEFAULT_LEVEL,
+    fragmented: bool = False,
+) -> bytes:
+    """
+    compress_with_stats returns the same as ``main.compress`` and records
+    the work done into stats.
+    """
+    start = time.perf_counter()
+    src = byte_view(buf)
+    compressor = CountingCompressor(stats)
+    dst = bytearray(max_encoded_len(len(src)))
+    encode_start = time.perf_counter()
+    d = compressor.compress_into(src, dst, 0, max_offset, level, fragmented)
+    output_start = time.perf_counter()
+    with memoryview(dst) as view:
+        result = view[:d].tobytes()
+    end = time.perf_counter()
+
+    for tags in iter_tags(result):
+        record_tags(stats, tags)
+    stats.calls += 1
+    stats.uncompressed_bytes += len(src)
+    stats.compressed_bytes += len(result)
+    phase_times = stats.phase_times
+    phase_times["setup"] += encode_start - start
+    phase_times["encode"] += output_start - encode_start
+    phase_times["output"] += end - output_start
+    return result
+
+
+def decompress_with_stats(
+    buf: BufferType, stats: CompressionStats, max_length: Optional[int] = None
+) -> bytes:
+    """
+    decompress_with_stats returns the same as ``main.decompress`` and
+    records the elements decoded into stats.
+    """
+    start = time.perf_counter()
+    src = byte_view(buf)
+    block_length, length_header_size = extract_meta(src, max_length)
+    check_block_length(len(src), length_header_size, block_length)
+    decode_start = time.perf_counter()
+    dst = bytearray(block_length)
+    decompress_block(src, length_header_size, dst)
+    output_start = time.perf_counter()
+    result = bytes(dst)
+    end = time.perf_counter()
+
+    for tags in iter_tags(src, max_length):
+        record_tags(stats, tags)
+    stats.calls += 1
+    stats.uncompressed_bytes += block_length
+    stats.compressed_bytes += len(src)
+    phase_times = stats.phase_times
+    phase_times["header"] += decode_start - start
+    phase_times["decode"] += output_start - decode_start
+    phase_times["output"] += end - output_start
+    return result
@@ -0,0 +1,41 @@
+# Disassembly of compressed blocks into their elements, without decoding
+# them. The tags are read by ``main.iter_elements``, the decoder of tags that
+# ``decompress`` uses, and the elements are returned in batches of parallel
+# arrays so that a multi-megabyte block never needs one Python object per
+# element.
+from typing import Iterator, Optional
+
+from .main import (
+    DEFAULT_BATCH_SIZE,
+    BufferType,
+    Tags,
+    byte_view,
+    check_block_length,
+    extract_meta,
+    iter_block_tags,
+)
+
+
+# The names of the tag types, indexed by tag type.
+TAG_NAMES = ("LITERAL", "COPY_1", "COPY_2", "COPY_4")
+
+
+def iter_tags(
+    buf: BufferType,
+    max_length: Optional[int] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[Tags]:
+    """
+    iter_tags yields the elements of the compressed block buf, in batches of
+    up to batch_size.
+
+    The block is checked as it is walked: TooLargeError and CorruptError are
+    raised as ``decompress`` would raise them, once the elements before the
+    error have been yielded.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive")
+    src = byte_view(buf)
+    block_length, pos = extract_meta(src, max_length)
+    check_block_length(len(src), pos, block_length)
+    yield from iter_block_tags(src, pos, block_length, batch_size)
@@ -56,7 +56,10 @@ setup(
     license="MIT",
     zip_safe=False,
     keywords='ethereum',
-    packages=find_packages(exclude=["tests", "tests.*"]),
+    packages=find_packages(exclude=["tests", "tests.*", "benchmarks", "benchmarks.*"]),
+    entry_points={
+        'console_scripts': ['py-snappy=py_snappy.cli:main'],
+    },
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
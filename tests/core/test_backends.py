@@ -0,0 +1,107 @@
+import os
+import subprocess
+import sys
+
+from hypothesis import given, settings
+import pytest
+
+import py_snappy
+from py_snappy import (
+    BaseSnappyError,
+    CorruptError,
+    TooLargeError,
+    available_backends,
+    compress,
+    decompress,
+    get_backend,
+    set_backend,
+)
+from py_snappy.backends import AUTO, AUTO_ORDER, BACKEND_ENV_VAR, LOADERS, PURE_PYTHON
+from py_snappy.main import (
+    compress as pure_compress,
+    decompress as pure_decompress,
+    putuvarint,
+)
+
+from tests.core.strategies import random_test_vectors_small_st
+
+
+NATIVE_BACKENDS = [name for name in available_backends() if name != PURE_PYTHON]
+
+
+@pytest.fixture(params=NATIVE_BACKENDS)
+def native_backend(request):
+    assert set_backend(request.param) == request.param
+    try:
+        yield request.param
+    finally:
+        set_backend(PURE_PYTHON)
+
+
+def test_pure_python_is_the_default():
+    assert get_backend() == PURE_PYTHON
+    assert available_backends()[0] == PURE_PYTHON
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        set_backend("zstd")
+    assert get_backend() == PURE_PYTHON
+
+
+def test_native_backend_round_trip(native_backend):
+    assert get_backend() == native_backend
+    value = b"abcd" * 1000 + bytes(range(256))
+    compressed = compress(value)
+    assert decompress(compressed) == value
+    assert pure_decompress(compressed) == value
+    assert decompress(pure_compress(value)) == value
+
+
+def test_encoder_options_use_pure_python(native_backend):
+    value = b"abcd" * 1000
+    assert compress(value, level=2) == pure_compress(value, level=2)
+    assert compress(value, fragmented=True) == pure_compress(value, fragmented=True)
+
+
+@given(value=random_test_vectors_small_st)
+@settings(max_examples=500)
+def test_native_backend_error_parity(value):
+    try:
+        expected = pure_decompress(value)
+    except BaseSnappyError as err:
+        expected = type(err)
+
+    for name in NATIVE_BACKENDS:
+        set_backend(name)
+        try:
+            actual = decompress(value)
+        except BaseSnappyError as err:
+            actual = type(err)
+        finally:
+            set_backend(PURE_PYTHON)
+        assert actual == expected, name
+
+
+def test_native_backend_length_checks(native_backend):
+    with pytest.raises(TooLargeError):
+        decompress(compress(b"x" * 100), max_length=99)
+    with pytest.raises(CorruptError):
+        decompress(putuvarint(0x7FFFFFFF) + b"\x00")
+    with pytest.raises(CorruptError):
+        decompress(b"")
+
+
+@pytest.mark.parametrize("name", sorted(LOADERS) + [AUTO])
+def test_backend_from_environment(name):
+    env = dict(os.environ, **{BACKEND_ENV_VAR: name})
+    if name == AUTO:
+        expected = next((n for n in AUTO_ORDER if n in NATIVE_BACKENDS), PURE_PYTHON)
+    else:
+        expected = name if name in NATIVE_BACKENDS else PURE_PYTHON
+    output = subprocess.check_output(
+        [sys.executable, "-c", "import py_snappy; print(py_snappy.get_backend())"],
+        env=env,
+        cwd=os.path.dirname(os.path.dirname(py_snappy.__file__)),
+    )
+    assert output.decode().strip() == expected
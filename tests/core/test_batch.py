@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from py_snappy import (
+    BaseSnappyError,
+    CorruptError,
+    compress,
+    compress_many,
+    decompress,
+    decompress_many,
+)
+
+
+VALUES = [b"", b"abc", b"abcd" * 100, os.urandom(1000), b"\x00" * 100000]
+CORRUPT = b"\x0a\x04ab\x1e\x00\x00"
+
+
+def split(result):
+    return [
+        bytes(result.data[start:end])
+        for start, end in zip(result.offsets, result.offsets[1:])
+    ]
+
+
+def test_compress_many():
+    assert compress_many(VALUES) == [compress(value) for value in VALUES]
+
+
+def test_compress_many_concatenated():
+    result = compress_many(iter(VALUES), concatenate=True)
+    assert split(result) == [compress(value) for value in VALUES]
+    assert result.errors == {}
+
+
+def test_decompress_many():
+    compressed = [compress(value) for value in VALUES]
+    assert decompress_many(compressed) == VALUES
+
+
+def test_decompress_many_concatenated():
+    compressed = [compress(value) for value in VALUES]
+    result = decompress_many(compressed, concatenate=True)
+    assert split(result) == VALUES
+    assert bytes(result.data) == b"".join(VALUES)
+    assert result.errors == {}
+
+
+@pytest.mark.parametrize("concatenate", (False, True))
+def test_decompress_many_reports_errors_per_item(concatenate):
+    compressed = [compress(value) for value in VALUES]
+    items = compressed[:2] + [CORRUPT, b""] + compressed[2:]
+
+    result = decompress_many(items, concatenate=concatenate)
+
+    if concatenate:
+        assert set(result.errors) == {2, 3}
+        assert all(isinstance(err, CorruptError) for err in result.errors.values())
+        results = split(result)
+        assert results[2] == results[3] == b""
+        del results[2:4]
+    else:
+        assert isinstance(result[2], CorruptError)
+        assert isinstance(result[3], CorruptError)
+        results = result[:2] + result[4:]
+    assert results == VALUES
+
+    for item in (CORRUPT, b""):
+        with pytest.raises(BaseSnappyError):
+            decompress(item)
@@ -0,0 +1,88 @@
+from hypothesis import given, settings, strategies as st
+import pytest
+
+from py_snappy import (
+    BaseSnappyError,
+    BlockDecoder,
+    CorruptError,
+    TooLargeError,
+    compress,
+    decompress,
+    iter_decompress,
+)
+from snappy import compress as libsnappy_compress
+
+from tests.core.strategies import (
+    random_test_vectors_large_st,
+    random_test_vectors_small_st,
+)
+
+
+def _split(data, sizes):
+    pieces, pos = [], 0
+    for size in sizes:
+        pieces.append(data[pos : pos + size])  # noqa: E203
+        pos += size
+    pieces.append(data[pos:])
+    return pieces
+
+
+@given(
+    value=random_test_vectors_large_st,
+    sizes=st.lists(st.integers(min_value=0, max_value=70000), max_size=20),
+)
+@settings(max_examples=100)
+def test_block_decoder_round_trip(value, sizes):
+    for compressed in (compress(value), libsnappy_compress(value)):
+        assert b"".join(iter_decompress(_split(compressed, sizes))) == value
+
+
+@given(value=random_test_vectors_small_st)
+@settings(max_examples=1000)
+def test_block_decoder_agrees_with_decompress(value):
+    try:
+        expected = decompress(value)
+    except BaseSnappyError:
+        expected = None
+
+    decoder = BlockDecoder()
+    output = bytearray()
+    try:
+        for byte_index in range(len(value)):
+            output += decoder.feed(value[byte_index : byte_index + 1])  # noqa: E203
+        decoder.flush()
+    except BaseSnappyError:
+        assert expected is None
+    else:
+        assert output == expected
+
+
+def test_block_decoder_output_is_progressive():
+    value = bytes(range(256)) * 1024
+    compressed = libsnappy_compress(value)
+    decoder = BlockDecoder()
+    assert decoder.feed(compressed[:1000])
+    assert not decoder.done
+    rest = decoder.feed(compressed[1000:])
+    assert decoder.done
+    assert decoder.flush() == b""
+    assert len(rest) < len(value)
+
+
+def test_block_decoder_rejects_truncated_and_trailing_data():
+    compressed = compress(b"abcd" * 100)
+
+    decoder = BlockDecoder()
+    decoder.feed(compressed[:-1])
+    with pytest.raises(CorruptError):
+        decoder.flush()
+
+    decoder = BlockDecoder()
+    with pytest.raises(CorruptError):
+        decoder.feed(compressed + b"\x00")
+
+
+def test_block_decoder_max_length():
+    decoder = BlockDecoder(max_length=10)
+    with pytest.raises(TooLargeError):
+        decoder.feed(compress(b"x" * 11)[:1])
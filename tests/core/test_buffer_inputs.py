@@ -0,0 +1,43 @@
+import array
+import mmap
+
+import pytest
+
+from py_snappy import compress, decompress
+
+
+VALUE = b"".join(bytes([i]) * 17 + bytes(range(i)) for i in range(64))
+
+
+def to_mmap(value):
+    buf = mmap.mmap(-1, len(value))
+    buf.write(value)
+    return buf
+
+
+BUFFER_TYPES = (
+    bytes,
+    bytearray,
+    memoryview,
+    lambda v: memoryview(b"\xff" * 7 + v + b"\xff" * 3)[7:-3],
+    lambda v: array.array("B", v),
+    to_mmap,
+)
+
+
+def to_uint32_array(value):
+    return array.array("I", value[: len(value) - len(value) % 4])
+
+
+@pytest.mark.parametrize("to_buffer", BUFFER_TYPES + (to_uint32_array,))
+def test_compress_buffer_types(to_buffer):
+    buf = to_buffer(VALUE)
+    expected = bytes(memoryview(buf).cast("B"))
+    assert compress(buf) == compress(expected)
+    assert decompress(compress(buf)) == expected
+
+
+@pytest.mark.parametrize("to_buffer", BUFFER_TYPES)
+def test_decompress_buffer_types(to_buffer):
+    compressed = compress(VALUE)
+    assert decompress(to_buffer(compressed)) == VALUE
@@ -0,0 +1,217 @@
+import subprocess
+import sys
+
+import pytest
+
+from py_snappy import CorruptError, StreamCompressor, cli, compress
+from py_snappy.cli import INPUT_WINDOW, main
+from py_snappy.constants import MAX_UNCOMPRESSED_CHUNK_LEN
+
+from tests.core.test_official_test_vectors import load_fixture
+
+
+def test_inspect(tmp_path, capsys):
+    value = load_fixture("alice29.txt")
+    path = tmp_path / "alice29.txt.snappy"
+    path.write_bytes(compress(value))
+
+    assert main(["inspect", str(path)]) == 0
+    summary = capsys.readouterr().out
+    assert f"block length       {len(value)} bytes" in summary
+    assert "copy lengths" in summary and "copy offsets" in summary
+
+
+def test_inspect_tags(tmp_path, capsys):
+    path = tmp_path / "repeated.snappy"
+    path.write_bytes(compress(b"abcd" * 10))
+
+    assert main(["inspect", "--tags", str(path)]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].split() == ["position", "output", "kind", "length", "offset"]
+    assert lines[1].split() == ["1", "0", "LITERAL", "4"]
+    assert lines[2].split()[:3] == ["6", "4", "COPY_2"]
+    assert lines[2].split()[4] == "4"
+
+
+def test_inspect_corrupt_block(tmp_path, capsys):
+    path = tmp_path / "truncated.snappy"
+    path.write_bytes(compress(load_fixture("alice29.txt"))[:1000])
+    assert main(["inspect", str(path)]) == 1
+    assert capsys.readouterr().err == "py_snappy: CorruptError\n"
+
+
+def test_inspect_empty_file(tmp_path, capsys):
+    path = tmp_path / "empty"
+    path.write_bytes(b"")
+    assert main(["inspect", str(path)]) == 1
+
+
+def test_python_m_inspect_from_stdin():
+    result = subprocess.run(
+        [sys.executable, "-m", "py_snappy", "inspect"],
+        input=compress(b"hello " * 100),
+        stdout=subprocess.PIPE,
+        check=True,
+    )
+    assert b"block length       600 bytes" in result.stdout
+
+
+@pytest.fixture
+def fixture_file(tmp_path):
+    path = tmp_path / "alice29.txt"
+    path.write_bytes(load_fixture("alice29.txt"))
+    return path
+
+
+def framed(value):
+    compressor = StreamCompressor()
+    return compressor.add_chunk(value) + compressor.flush()
+
+
+@pytest.mark.parametrize("window", (MAX_UNCOMPRESSED_CHUNK_LEN, INPUT_WINDOW))
+def test_compress_decompress_framed(fixture_file, tmp_path, monkeypatch, window):
+    monkeypatch.setattr(cli, "INPUT_WINDOW", window)
+    value = fixture_file.read_bytes()
+    compressed_path = tmp_path / "out.sz"
+    decompressed_path = tmp_path / "out"
+
+    assert main(["compress", str(fixture_file), "-o", str(compressed_path)]) == 0
+    assert compressed_path.read_bytes() == framed(value)
+    assert main(["decompress", str(compressed_path), "-o", str(decompressed_path)]) == 0
+    assert decompressed_path.read_bytes() == value
+
+
+def test_compress_decompress_raw(fixture_file, tmp_path):
+    value = fixture_file.read_bytes()
+    compressed_path = tmp_path / "out.raw"
+    decompressed_path = tmp_path / "out"
+
+    args = ["compress", "--format", "raw", str(fixture_file)]
+    assert main(args + ["-o", str(compressed_path)]) == 0
+    assert compressed_path.read_bytes() == compress(value)
+    for input_format in ("raw", "auto"):
+        args = ["decompress", "--format", input_format, str(compressed_path)]
+        assert main(args + ["-o", str(decompressed_path)]) == 0
+        assert decompressed_path.read_bytes() == value
+
+
+def test_compress_level(fixture_file, tmp_path):
+    value = fixture_file.read_bytes()
+    compressed_path = tmp_path / "out.sz"
+    args = ["compress", "--level", "3", str(fixture_file)]
+    assert main(args + ["-o", str(compressed_path)]) == 0
+    compressor = StreamCompressor(level=3)
+    expected = compressor.add_chunk(value) + compressor.flush()
+    assert compressed_path.read_bytes() == expected
+
+
+def test_cat(fixture_file, tmp_path, capsysbinary):
+    value = fixture_file.read_bytes()
+    raw_path, framed_path = tmp_path / "a.raw", tmp_path / "b.sz"
+    raw_path.write_bytes(compress(value[:1000]))
+    framed_path.write_bytes(framed(value))
+
+    assert main(["cat", str(raw_path), str(framed_path), str(raw_path)]) == 0
+    assert capsysbinary.readouterr().out == value[:1000] + value + value[:1000]
+
+
+def test_jobs(fixture_file, tmp_path, capsysbinary):
+    value = fixture_file.read_bytes() * 8
+    fixture_file.write_bytes(value)
+    compressed_path = tmp_path / "out.sz"
+
+    args = ["compress", "--jobs", "2", str(fixture_file)]
+    assert main(args + ["-o", str(compressed_path)]) == 0
+    assert compressed_path.read_bytes() == framed(value)
+    assert main(["cat", "--jobs", "2", str(compressed_path)]) == 0
+    assert capsysbinary.readouterr().out == value
+
+
+def test_python_m_jobs_pipes():
+    value = load_fixture("alice29.txt") * 8
+    command = [sys.executable, "-m", "py_snappy"]
+    compressed = subprocess.run(
+        command + ["compress", "--jobs", "2"],
+        input=value,
+        stdout=subprocess.PIPE,
+        check=True,
+    ).stdout
+    assert compressed == framed(value)
+    decompressed = subprocess.run(
+        command + ["decompress", "-j", "2"],
+        input=compressed,
+        stdout=subprocess.PIPE,
+        check=True,
+    ).stdout
+    assert decompressed == value
+
+
+def test_empty_input(tmp_path):
+    empty_path, compressed_path = tmp_path / "empty", tmp_path / "empty.sz"
+    empty_path.write_bytes(b"")
+    assert main(["compress", str(empty_path), "-o", str(compressed_path)]) == 0
+    assert compressed_path.read_bytes() == framed(b"")
+    assert main(["decompress", str(compressed_path), "-o", str(empty_path)]) == 0
+    assert empty_path.read_bytes() == b""
+
+
+def test_corrupt_input_removes_output(fixture_file, tmp_path, capsys):
+    compressed_path, output_path = tmp_path / "truncated.sz", tmp_path / "out"
+    compressed_path.write_bytes(framed(fixture_file.read_bytes())[:-10])
+
+    assert main(["decompress", str(compressed_path), "-o", str(output_path)]) == 1
+    error = capsys.readouterr().err
+    assert error == "py_snappy: CorruptError: Snappy stream is truncated\n"
+    assert not output_path.exists()
+
+
+def test_max_length(fixture_file, tmp_path):
+    compressed_path = tmp_path / "out.sz"
+    compressed_path.write_bytes(framed(fixture_file.read_bytes()))
+    assert main(["cat", "--max-length", "1000", str(compressed_path)]) == 1
+
+
+def test_open_input_closes_mapping_on_error(fixture_file):
+    def read(buf):
+        view = memoryview(buf)[1:]
+        raise CorruptError(view.nbytes)
+
+    with pytest.raises(CorruptError):
+        with cli.open_input(str(fixture_file)) as mapped:
+            read(mapped)
+    assert mapped.closed
+
+
+def test_missing_input(tmp_path, capsys):
+    assert main(["decompress", str(tmp_path / "missing")]) == 1
+    assert "No such file or directory" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    "args",
+    (
+        ["compress", "--jobs", "0"],
+        ["compress", "--jobs", "2", "--format", "raw"],
+        ["compress", "--jobs", "2", "--level", "2"],
+        ["compress", "--level", "5"],
+        ["decompress", "--jobs", "2", "--max-length", "10"],
+        ["cat", "--jobs", "2", "--format", "raw"],
+    ),
+)
+def test_invalid_arguments(args, capsys):
+    with pytest.raises(SystemExit) as excinfo:
+        main(args)
+    assert excinfo.value.code == 2
+
+
+def test_python_m_pipes():
+    value = load_fixture("alice29.txt")
+    command = [sys.executable, "-m", "py_snappy"]
+    compressed = subprocess.run(
+        command + ["compress"], input=value, stdout=subprocess.PIPE, check=True
+    ).stdout
+    assert compressed == framed(value)
+    decompressed = subprocess.run(
+        command + ["decompress"], input=compressed, stdout=subprocess.PIPE, check=True
+    ).stdout
+    assert decompressed == value
@@ -0,0 +1,162 @@
+"""
+Check that compression and decompression time grows linearly with the input.
+
+Each operation is timed on inputs of doubling size and a growth exponent is
+fitted to the timings: 1 for linear scaling, 2 for quadratic. Timings are the
+best of several runs, and only sizes of at least FIT_MIN_SIZE are fitted,
+where per-call overhead no longer hides the per-byte cost. Linear operations
+fit exponents of about 0.5 to 1.35 here, the excess coming from cache and
+allocation effects on the largest inputs. The tolerance is loose enough for
+noisy machines while still catching quadratic behaviour, which fits exponents
+close to 2.
+"""
+import math
+import random
+import time
+
+import pytest
+
+from py_snappy import (
+    BlockDecoder,
+    StreamCompressor,
+    StreamDecompressor,
+    compress,
+    decompress,
+)
+
+
+SIZES = [1024 << shift for shift in range(13)]  # 1 KiB to 4 MiB
+FIT_MIN_SIZE = 64 * 1024
+MAX_EXPONENT = 1.5
+MIN_REPEAT = 3
+MIN_TIME = 0.02
+PIECE_SIZE = 64 * 1024
+
+
+def literal_heavy(size):
+    # Long runs of random bytes, each followed by one short copy.
+    rng = random.Random(size)
+    out = bytearray()
+    while len(out) < size:
+        out += rng.getrandbits(8 * 2000).to_bytes(2000, "little")
+        out += out[-100:-92]
+    return bytes(out[:size])
+
+
+def copy_heavy(size):
+    # Short random patterns repeated many times, giving long overlapping copies.
+    rng = random.Random(size)
+    out = bytearray()
+    while len(out) < size:
+        pattern_len = rng.randrange(1, 200)
+        pattern = rng.getrandbits(8 * pattern_len).to_bytes(pattern_len, "little")
+        out += pattern * rng.randrange(2, 100)
+    return bytes(out[:size])
+
+
+def random_data(size):
+    return random.Random(size).getrandbits(8 * size).to_bytes(size, "little")
+
+
+def decode_in_pieces(compressed):
+    decoder = BlockDecoder()
+    for start in range(0, len(compressed), PIECE_SIZE):
+        decoder.feed(compressed[start : start + PIECE_SIZE])  # noqa: E203
+    decoder.flush()
+
+
+def frame(value):
+    compressor = StreamCompressor()
+    return compressor.add_chunk(value) + compressor.flush()
+
+
+def unframe_in_pieces(framed):
+    decompressor = StreamDecompressor()
+    for start in range(0, len(framed), PIECE_SIZE):
+        decompressor.decompress(framed[start : start + PIECE_SIZE])  # noqa: E203
+    decompressor.flush()
+
+
+# Each operation is given the uncompressed input and returns a function of
+# no arguments to time.
+def compress_operation(value):
+    return lambda: compress(value)
+
+
+def decompress_operation(value):
+    compressed = compress(value)
+    return lambda: decompress(compressed)
+
+
+def block_decoder_operation(value):
+    compressed = compress(value)
+    return lambda: decode_in_pieces(compressed)
+
+
+def stream_decompressor_operation(value):
+    framed = frame(value)
+    return lambda: unframe_in_pieces(framed)
+
+
+OPERATIONS = {
+    "compress": compress_operation,
+    "decompress": decompress_operation,
+    "block_decoder": block_decoder_operation,
+    "stream_decompressor": stream_decompressor_operation,
+}
+
+DATA = {"literal_heavy": literal_heavy, "copy_heavy": copy_heavy, "random": random_data}
+
+
+def best_time(fn):
+    """
+    Return the best time of at least MIN_REPEAT runs of fn, running it until
+    MIN_TIME has passed so that quick operations get more chances.
+    """
+    best, total, runs = math.inf, 0.0, 0
+    while runs < MIN_REPEAT or total < MIN_TIME:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+        runs += 1
+    return best
+
+
+def growth_exponent(sizes, times):
+    """
+    Return the slope of the least squares fit of log(time) against log(size).
+    """
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in times]
+    x_mean = sum(xs) / len(xs)
+    y_mean = sum(ys) / len(ys)
+    return sum((x - x_mean) * (y - y_mean) for x, y in zip(xs, ys)) / sum(
+        (x - x_mean) ** 2 for x in xs
+    )
+
+
+def test_growth_exponent():
+    sizes = [1, 2, 4, 8]
+    assert growth_exponent(sizes, [size * 3 for size in sizes]) == pytest.approx(1)
+    assert growth_exponent(sizes, [size ** 2 for size in sizes]) == pytest.approx(2)
+
+
+@pytest.mark.parametrize("data_name", sorted(DATA))
+@pytest.mark.parametrize("operation_name", sorted(OPERATIONS))
+def test_scaling_is_linear(operation_name, data_name):
+    make_data, make_operation = DATA[data_name], OPERATIONS[operation_name]
+    fitted_sizes, times = [], []
+    for size in SIZES:
+        elapsed = best_time(make_operation(make_data(size)))
+        if size >= FIT_MIN_SIZE:
+            fitted_sizes.append(size)
+            times.append(elapsed)
+
+    exponent = growth_exponent(fitted_sizes, times)
+    timings = ", ".join(
+        f"{size}: {t * 1000:.1f}ms" for size, t in zip(fitted_sizes, times)
+    )
+    scaling = f"{operation_name} on {data_name} data scales as size ** {exponent:.2f}"
+    assert exponent < MAX_EXPONENT, f"{scaling}: {timings}"
@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+from py_snappy import compress, decompress
+from py_snappy.main import max_encoded_len
+
+
+# random data is emitted as a single literal, which exercises every form of
+# the literal tag header.
+@pytest.mark.parametrize(
+    "length", (0, 1, 4, 5, 60, 61, 240, 241, 244, 245, 65536, 65537, 100000)
+)
+def test_compress_incompressible_within_max_encoded_len(length):
+    value = os.urandom(length)
+    compressed = compress(value)
+    assert isinstance(compressed, bytes)
+    assert len(compressed) <= max_encoded_len(length)
+    assert decompress(compressed) == value
+
+
+def test_last_byte_of_match_is_hashed():
+    # After the copy of "baba", the encoder hashes the position of its last
+    # byte, as the reference encoder does. That position starts "aaaa", so
+    # the run that follows is found as a copy at offset 1 rather than being
+    # emitted as a literal.
+    assert compress(b"bababaaaaa") == b"\x0a\x04ba\x01\x02\x01\x01"
@@ -0,0 +1,47 @@
+import os
+import threading
+
+from py_snappy import Compressor, compress, decompress
+from py_snappy.main import get_compressor
+
+
+VALUES = (
+    b"abcd" * 1000,
+    b"",
+    b"abc",
+    os.urandom(100),
+    b"abcd" * 10 + os.urandom(10) + b"abcd" * 10,
+    os.urandom(50000) * 3,
+    b"abcd" * 1000,
+)
+
+
+def test_compressor_reuse_matches_fresh_compressor():
+    compressor = Compressor()
+    for value in VALUES:
+        result = compressor.compress(value)
+        assert result == Compressor().compress(value)
+        assert decompress(result) == value
+
+
+def test_compressor_has_slots():
+    assert not hasattr(Compressor(), "__dict__")
+
+
+def test_compress_uses_thread_local_compressor():
+    compressors = []
+
+    def worker():
+        compressors.append(get_compressor())
+        for value in VALUES:
+            assert decompress(compress(value)) == value
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert get_compressor() is get_compressor()
+    assert len(set(map(id, compressors))) == len(threads)
+    assert get_compressor() not in compressors
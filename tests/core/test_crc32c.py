@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+from py_snappy.crc32c import crc32c, masked_crc32c
+
+
+def bitwise_crc32c(value):
+    crc = 0xFFFFFFFF
+    for byte in value:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0x82F63B78 if crc & 1 else crc >> 1
+    return crc ^ 0xFFFFFFFF
+
+
+# Test vectors from RFC 3720, section B.4
+@pytest.mark.parametrize(
+    "value,expected",
+    (
+        (b"", 0x00000000),
+        (b"123456789", 0xE3069283),
+        (b"\x00" * 32, 0x8A9136AA),
+        (b"\xff" * 32, 0x62A8AB43),
+        (bytes(range(32)), 0x46DD794E),
+        (bytes(range(31, -1, -1)), 0x113FDB5C),
+    ),
+)
+def test_crc32c_known_values(value, expected):
+    assert crc32c(value) == expected
+
+
+@pytest.mark.parametrize("length", (1, 7, 8, 9, 63, 64, 65, 1000, 65536))
+def test_crc32c_matches_bitwise_reference(length):
+    value = os.urandom(length)
+    assert crc32c(value) == bitwise_crc32c(value)
+    assert crc32c(memoryview(value)[1:]) == bitwise_crc32c(value[1:])
+    assert crc32c(bytearray(value)) == bitwise_crc32c(value)
+
+
+def test_crc32c_incremental():
+    value = os.urandom(1000)
+    assert crc32c(value[333:], crc32c(value[:333])) == crc32c(value)
+
+
+def test_masked_crc32c():
+    # the masked checksum of an empty chunk as written by the reference
+    # implementation
+    assert masked_crc32c(b"") == 0xA282EAD8
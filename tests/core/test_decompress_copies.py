@@ -0,0 +1,47 @@
+import pytest
+
+from py_snappy import compress, decompress, CorruptError
+from snappy import decompress as libsnappy_decompress, UncompressError
+
+
+@pytest.mark.parametrize(
+    "value",
+    (
+        b"\x00" * 60000,
+        b"ab" * 30000,
+        b"abc" * 20000,
+        b"0123456789" * 1000 + b"\xff" * 4096,
+    ),
+)
+def test_decompress_overlapping_copies(value):
+    assert decompress(compress(value)) == value
+
+
+@pytest.mark.parametrize(
+    "value,expected",
+    (
+        # literal "ab" followed by a COPY2 of length 8 at offset 2
+        (b"\x0a\x04ab\x1e\x02\x00", b"ab" * 5),
+        # literal "abcd" followed by a COPY1 of length 4 at offset 4
+        (b"\x08\x0cabcd\x01\x04", b"abcd" * 2),
+    ),
+)
+def test_decompress_copy_tags(value, expected):
+    assert decompress(value) == expected
+    assert libsnappy_decompress(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value",
+    (
+        # COPY2 with a zero offset
+        b"\x0a\x04ab\x1e\x00\x00",
+        # COPY1 reaching back before the start of the output
+        b"\x08\x0cabcd\x01\x05",
+    ),
+)
+def test_decompress_invalid_copy_offset(value):
+    with pytest.raises(CorruptError):
+        decompress(value)
+    with pytest.raises(UncompressError):
+        libsnappy_decompress(value)
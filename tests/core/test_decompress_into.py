@@ -0,0 +1,67 @@
+import mmap
+
+import pytest
+
+from py_snappy import (
+    compress,
+    decompress,
+    decompress_into,
+    BaseSnappyError,
+    CorruptError,
+    TooLargeError,
+)
+
+
+VALUE = b"abcd" * 100 + bytes(range(256)) + b"\x00" * 1000
+
+
+@pytest.mark.parametrize("out_offset", (0, 1, 17))
+def test_decompress_into_bytearray(out_offset):
+    out = bytearray(b"\xff" * (len(VALUE) + out_offset + 5))
+    assert decompress_into(compress(VALUE), out, out_offset) == len(VALUE)
+    assert out[:out_offset] == b"\xff" * out_offset
+    assert out[out_offset : out_offset + len(VALUE)] == VALUE  # noqa: E203
+    assert out[out_offset + len(VALUE) :] == b"\xff" * 5  # noqa: E203
+
+
+def test_decompress_into_memoryview_and_mmap():
+    compressed = compress(VALUE)
+
+    out = bytearray(len(VALUE) * 2)
+    second_half = memoryview(out)[len(VALUE) :]  # noqa: E203
+    assert decompress_into(compressed, second_half) == len(VALUE)
+    assert out[len(VALUE) :] == VALUE  # noqa: E203
+
+    mapped = mmap.mmap(-1, len(VALUE))
+    assert decompress_into(compressed, mapped) == len(VALUE)
+    assert mapped[:] == VALUE
+
+
+def test_decompress_into_buffer_too_small():
+    out = bytearray(len(VALUE))
+    with pytest.raises(TooLargeError):
+        decompress_into(compress(VALUE), out, 1)
+
+
+def test_decompress_into_read_only_buffer():
+    with pytest.raises(TypeError):
+        decompress_into(compress(VALUE), bytes(len(VALUE)))
+
+
+@pytest.mark.parametrize(
+    "value",
+    (
+        b"",
+        b"\x0a\x04ab\x1e\x00\x00",
+        b"\x08\x0cabcd\x01\x05",
+        b"\x05\x0cabcd",
+        compress(VALUE)[:-1],
+    ),
+)
+def test_decompress_into_error_parity(value):
+    with pytest.raises(BaseSnappyError) as decompress_error:
+        decompress(value)
+    with pytest.raises(BaseSnappyError) as decompress_into_error:
+        decompress_into(value, bytearray(len(VALUE)))
+    assert decompress_into_error.type is decompress_error.type
+    assert decompress_error.type is CorruptError
@@ -0,0 +1,57 @@
+import os
+
+from hypothesis import given, settings, strategies as st
+import pytest
+
+from py_snappy import Compressor, compress, decompress, iter_tags
+from py_snappy.main import (
+    FRAGMENT_SIZE,
+    MAX_COPY2_OFFSET,
+    MAX_LEVEL,
+    max_encoded_len,
+    putuvarint,
+)
+from snappy import compress as libsnappy_compress, decompress as libsnappy_decompress
+
+from tests.core.strategies import random_test_vectors_large_st
+from tests.core.test_official_test_vectors import load_fixture
+
+
+@given(value=random_test_vectors_large_st, level=st.sampled_from((1, MAX_LEVEL)))
+@settings(max_examples=50)
+def test_fragmented_round_trip(value, level):
+    compressed = compress(value, level=level, fragmented=True)
+    assert len(compressed) <= max_encoded_len(len(value))
+    assert decompress(compressed) == value
+    assert libsnappy_decompress(compressed) == value
+
+
+def test_fragments_are_compressed_independently():
+    repeats, rest = divmod(FRAGMENT_SIZE, 1000)
+    fragment = os.urandom(1000) * repeats + os.urandom(rest)
+    value = fragment * 3 + fragment[:100]
+
+    def body(data):
+        compressed = compress(data, max_offset=MAX_COPY2_OFFSET)
+        return compressed[len(putuvarint(len(data))) :]  # noqa: E203
+
+    expected = putuvarint(len(value)) + body(fragment) * 3 + body(fragment[:100])
+    assert compress(value, fragmented=True) == expected
+    assert Compressor().compress(value, fragmented=True) == expected
+
+
+@pytest.mark.parametrize("fixture_name", ("alice29.txt", "html_x_4", "kppkn.gtb"))
+def test_fragmented_ratio_is_close_to_libsnappy(fixture_name):
+    value = load_fixture(fixture_name)
+    compressed = compress(value, max_offset=MAX_COPY2_OFFSET, fragmented=True)
+    assert abs(len(compressed) - len(libsnappy_compress(value))) < len(value) // 200
+
+
+@pytest.mark.parametrize("max_offset", (16, 1 << 10, 1 << 15))
+@pytest.mark.parametrize("level", (1, MAX_LEVEL))
+def test_fragmented_honours_max_offset(max_offset, level):
+    value = load_fixture("alice29.txt")
+    compressed = compress(value, max_offset=max_offset, level=level, fragmented=True)
+    assert decompress(compressed) == value
+    offsets = [offset for tags in iter_tags(compressed) for offset in tags.offsets]
+    assert max(offsets) < max_offset
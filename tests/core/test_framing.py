@@ -0,0 +1,136 @@
+import io
+import os
+
+from hypothesis import given, settings
+import pytest
+
+from py_snappy import CorruptError, StreamCompressor, StreamDecompressor, TooLargeError
+from py_snappy.framing import compress_stream, decompress_stream
+from snappy import (
+    StreamCompressor as LibsnappyStreamCompressor,
+    StreamDecompressor as LibsnappyStreamDecompressor,
+)
+
+from tests.core.strategies import random_test_vectors_large_st
+
+VALUE = b"".join(bytes([i]) * 1000 + os.urandom(100) for i in range(200))
+
+
+def frame(value):
+    compressor = StreamCompressor()
+    return compressor.add_chunk(value) + compressor.flush()
+
+
+def unframe(framed, piece_size=None):
+    decompressor = StreamDecompressor()
+    if piece_size is None:
+        piece_size = len(framed) or 1
+    result = b"".join(
+        decompressor.decompress(framed[i : i + piece_size])  # noqa: E203
+        for i in range(0, len(framed), piece_size)
+    )
+    return result + decompressor.flush()
+
+
+@given(value=random_test_vectors_large_st)
+@settings(max_examples=200)
+def test_framing_round_trip(value):
+    assert unframe(frame(value)) == value
+
+
+@pytest.mark.parametrize("piece_size", (1, 7, 4096, 65536 + 17))
+def test_framing_decompress_in_pieces(piece_size):
+    assert unframe(frame(VALUE), piece_size) == VALUE
+
+
+def test_framing_libsnappy_compat():
+    framed = frame(VALUE)
+    assert LibsnappyStreamDecompressor().decompress(framed) == VALUE
+
+    libsnappy_framed = LibsnappyStreamCompressor().add_chunk(VALUE)
+    assert unframe(libsnappy_framed) == VALUE
+
+
+def test_framing_chunk_size():
+    framed = frame(b"\x00" * 65537)
+    decompressor = StreamDecompressor()
+    # stream identifier (10 bytes), then a first chunk holding 64 KiB
+    assert decompressor.decompress(framed[:10]) == b""
+    first_chunk_len = int.from_bytes(framed[11:14], "little")
+    first_chunk = framed[10 : 14 + first_chunk_len]  # noqa: E203
+    assert decompressor.decompress(first_chunk) == b"\x00" * 65536
+    rest = framed[len(first_chunk) + 10 :]  # noqa: E203
+    assert decompressor.decompress(rest) == b"\x00"
+
+
+def test_framing_empty_stream():
+    assert frame(b"") == b"\xff\x06\x00\x00sNaPpY"
+    assert unframe(frame(b"")) == b""
+
+
+def test_framing_skips_padding_and_skippable_chunks():
+    framed = frame(VALUE)
+    padded = (
+        framed[:10]
+        + b"\xfe\x05\x00\x00"  # noqa: W503
+        + b"\x00" * 5  # noqa: W503
+        + b"\x80\x00\x00\x00"  # noqa: W503
+        + framed[10:]  # noqa: W503
+        + framed[:10]  # noqa: W503
+    )
+    assert unframe(padded, 3) == VALUE
+
+
+@pytest.mark.parametrize(
+    "framed",
+    (
+        # missing stream identifier
+        frame(b"abc")[10:],
+        # invalid stream identifier
+        b"\xff\x06\x00\x00sNaPpX",
+        # reserved unskippable chunk type
+        frame(b"abc")[:10] + b"\x02\x00\x00\x00",
+        # checksum mismatch
+        frame(b"abc")[:14] + b"\x00" * 4 + frame(b"abc")[18:],
+        # truncated stream
+        frame(VALUE)[:-1],
+        # chunk larger than allowed by the format
+        frame(b"abc")[:10] + b"\x01\x05\x00\x01" + b"\x00" * 10,
+    ),
+    ids=(
+        "missing-identifier",
+        "invalid-identifier",
+        "unskippable-chunk",
+        "checksum-mismatch",
+        "truncated",
+        "oversized-chunk",
+    ),
+)
+def test_framing_corrupt_streams(framed):
+    with pytest.raises(CorruptError):
+        unframe(framed)
+
+
+def test_compress_stream_round_trip():
+    compressed = io.BytesIO()
+    compress_stream(io.BytesIO(VALUE), compressed)
+    decompressed = io.BytesIO()
+    decompress_stream(io.BytesIO(compressed.getvalue()), decompressed, blocksize=1000)
+    assert decompressed.getvalue() == VALUE
+
+
+def test_framing_skip_checksum_verification():
+    framed = frame(b"abc")
+    bad_checksum = framed[:14] + b"\x00" * 4 + framed[18:]
+    decompressor = StreamDecompressor(verify_checksums=False)
+    assert decompressor.decompress(bad_checksum) == b"abc"
+
+
+def test_framing_max_length():
+    framed = frame(b"x" * 65537)
+    decompressor = StreamDecompressor(max_length=65537)
+    assert decompressor.decompress(framed) == b"x" * 65537
+
+    decompressor = StreamDecompressor(max_length=65536)
+    with pytest.raises(TooLargeError):
+        decompressor.decompress(framed)
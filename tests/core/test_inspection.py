@@ -0,0 +1,65 @@
+from hypothesis import given, settings
+import pytest
+
+from py_snappy import (
+    BaseSnappyError,
+    CorruptError,
+    TooLargeError,
+    compress,
+    decompress,
+    uncompressed_length,
+    validate,
+)
+from snappy import compress as libsnappy_compress
+
+from tests.core.strategies import (
+    random_test_vectors_large_st,
+    random_test_vectors_small_st,
+)
+
+
+@given(value=random_test_vectors_large_st)
+@settings(max_examples=200)
+def test_validate_and_uncompressed_length_of_valid_blocks(value):
+    for compressed in (compress(value), libsnappy_compress(value)):
+        assert uncompressed_length(compressed) == len(value)
+        assert validate(compressed) is True
+        assert validate(memoryview(compressed)) is True
+
+
+@given(value=random_test_vectors_small_st)
+@settings(max_examples=1000)
+def test_validate_agrees_with_decompress(value):
+    try:
+        decompress(value)
+    except BaseSnappyError:
+        assert validate(value) is False
+    else:
+        assert validate(value) is True
+
+
+@pytest.mark.parametrize(
+    "value",
+    (
+        b"",
+        b"\x0a\x04ab\x1e\x00\x00",
+        b"\x08\x0cabcd\x01\x05",
+        b"\x05\x0cabcd",
+        b"\x0b\x0cabcd\x01\x04",
+        b"\x04\xf0",
+        b"\x02\x03\x00\x00\x00\x00",
+    ),
+)
+def test_validate_corrupt_blocks(value):
+    assert validate(value) is False
+    with pytest.raises(BaseSnappyError):
+        decompress(value)
+
+
+def test_uncompressed_length_errors():
+    with pytest.raises(CorruptError):
+        uncompressed_length(b"")
+    with pytest.raises(CorruptError):
+        uncompressed_length(b"\xff\xff\xff\xff\x7f")
+    with pytest.raises(TooLargeError):
+        uncompressed_length(b"\x80\x80\x80\x80\x08")
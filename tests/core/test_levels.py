@@ -0,0 +1,52 @@
+from hypothesis import given, settings, strategies as st
+import pytest
+
+from py_snappy import StreamDecompressor, StreamCompressor, compress, decompress
+from py_snappy.main import MAX_COPY4_OFFSET, MAX_LEVEL, MIN_LEVEL, max_encoded_len
+from snappy import decompress as libsnappy_decompress
+
+from tests.core.strategies import random_test_vectors_small_st
+from tests.core.test_official_test_vectors import load_fixture
+
+
+LEVELS = range(MIN_LEVEL, MAX_LEVEL + 1)
+
+
+@given(
+    value=random_test_vectors_small_st,
+    level=st.sampled_from(LEVELS),
+    max_offset=st.sampled_from((1 << 15, MAX_COPY4_OFFSET)),
+)
+@settings(max_examples=500)
+def test_level_round_trip(value, level, max_offset):
+    compressed = compress(value, max_offset=max_offset, level=level)
+    assert len(compressed) <= max_encoded_len(len(value))
+    assert decompress(compressed) == value
+    assert libsnappy_decompress(compressed) == value
+
+
+@pytest.mark.parametrize("fixture_name", ("alice29.txt", "html", "kppkn.gtb"))
+def test_higher_levels_compress_better(fixture_name):
+    value = load_fixture(fixture_name)[:50000]
+    sizes = []
+    for level in LEVELS:
+        compressed = compress(value, level=level)
+        assert libsnappy_decompress(compressed) == value
+        sizes.append(len(compressed))
+    assert sizes == sorted(sizes, reverse=True)
+    assert sizes[-1] < sizes[0]
+
+
+@pytest.mark.parametrize("level", (MIN_LEVEL - 1, MAX_LEVEL + 1))
+def test_invalid_level(level):
+    with pytest.raises(ValueError):
+        compress(b"abcde", level=level)
+
+
+def test_framing_level():
+    value = load_fixture("alice29.txt")
+    compressor = StreamCompressor(level=MAX_LEVEL)
+    framed = compressor.add_chunk(value) + compressor.flush()
+    default = StreamCompressor()
+    assert len(framed) < len(default.add_chunk(value))
+    assert StreamDecompressor().decompress(framed) == value
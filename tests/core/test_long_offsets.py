@@ -0,0 +1,67 @@
+import os
+
+from hypothesis import given, settings, strategies as st
+import pytest
+
+from py_snappy import CorruptError, compress, decompress, iter_decompress, validate
+from py_snappy.main import MAX_COPY2_OFFSET, MAX_COPY4_OFFSET, max_encoded_len
+from snappy import decompress as libsnappy_decompress
+
+from tests.core.strategies import random_test_vectors_large_st
+
+
+RECORD = os.urandom(50000)
+SNAPSHOT = b"".join(RECORD + os.urandom(i) for i in range(20, 30)) * 2
+
+
+@given(
+    value=random_test_vectors_large_st,
+    max_offset=st.sampled_from((MAX_COPY2_OFFSET, 1 << 20, MAX_COPY4_OFFSET)),
+)
+@settings(max_examples=100)
+def test_long_offset_round_trip(value, max_offset):
+    compressed = compress(value, max_offset=max_offset)
+    assert len(compressed) <= max_encoded_len(len(value))
+    assert decompress(compressed) == value
+    assert libsnappy_decompress(compressed) == value
+
+
+def test_long_offsets_improve_ratio_on_distant_repeats():
+    default = compress(SNAPSHOT)
+    copy2 = compress(SNAPSHOT, max_offset=MAX_COPY2_OFFSET)
+    copy4 = compress(SNAPSHOT, max_offset=MAX_COPY4_OFFSET)
+    assert len(copy4) < len(copy2) <= len(default)
+    for compressed in (copy2, copy4):
+        assert decompress(compressed) == SNAPSHOT
+        assert libsnappy_decompress(compressed) == SNAPSHOT
+        assert validate(compressed)
+        assert b"".join(iter_decompress([compressed])) == SNAPSHOT
+
+
+@pytest.mark.parametrize("max_offset", (0, MAX_COPY4_OFFSET + 1))
+def test_invalid_max_offset(max_offset):
+    with pytest.raises(ValueError):
+        compress(b"abc", max_offset=max_offset)
+
+
+def test_decompress_copy4():
+    # a 4 byte literal followed by a COPY_4 of 6 bytes at offset 4
+    block = b"\x0a\x0cabcd\x17\x04\x00\x00\x00"
+    assert decompress(block) == b"abcdabcdab"
+    assert validate(block)
+    for i in range(len(block)):
+        assert b"".join(iter_decompress([block[:i], block[i:]])) == b"abcdabcdab"
+
+
+@pytest.mark.parametrize(
+    "block",
+    (
+        b"\x0a\x0cabcd\x17\x05\x00\x00\x00",  # offset past the start of the block
+        b"\x0a\x0cabcd\x17\x00\x00\x00\x00",  # zero offset
+        b"\x0a\x0cabcd\x17\x04\x00\x00",  # truncated tag
+    ),
+)
+def test_decompress_invalid_copy4(block):
+    with pytest.raises(CorruptError):
+        decompress(block)
+    assert not validate(block)
@@ -0,0 +1,30 @@
+from hypothesis import given, settings, strategies as st
+
+from py_snappy.main import match_length
+
+
+def naive_match_length(src, i, j):
+    length = 0
+    while i + length < len(src) and src[i + length] == src[j + length]:
+        length += 1
+    return length
+
+
+@st.composite
+def match_st(draw):
+    pattern = draw(st.binary(min_size=1, max_size=100))
+    repeats = draw(st.integers(min_value=1, max_value=20))
+    src = pattern * repeats + draw(st.binary(max_size=100))
+    i = draw(st.integers(min_value=1, max_value=len(src)))
+    j = draw(st.integers(min_value=0, max_value=i - 1))
+    return src, i, j
+
+
+@given(value=match_st())
+@settings(max_examples=2000)
+def test_match_length(value):
+    src, i, j = value
+    expected = naive_match_length(src, i, j)
+    assert match_length(src, i, j) == expected
+    assert match_length(bytearray(src), i, j) == expected
+    assert match_length(memoryview(src), i, j) == expected
@@ -0,0 +1,121 @@
+import pytest
+
+from py_snappy import (
+    BlockDecoder,
+    CorruptError,
+    StreamCompressor,
+    StreamDecompressor,
+    TooLargeError,
+    compress,
+    compress_ssz_snappy,
+    decompress,
+    decompress_into,
+    decompress_many,
+    decompress_ssz_snappy,
+    get_default_max_length,
+    iter_tags,
+    set_default_max_length,
+    validate,
+)
+from py_snappy.constants import DEFAULT_MAX_LENGTH
+from py_snappy.main import putuvarint
+
+
+def _header(length):
+    return bytes(putuvarint(length))
+
+
+@pytest.mark.parametrize("length", (0x7FFFFFFF, 0x10000000, 1 << 20))
+def test_forged_length_header_is_rejected(length):
+    # a 6 byte message claiming a huge decoded length must not allocate it
+    forged = _header(length) + b"\x00"
+    with pytest.raises(CorruptError):
+        decompress(forged)
+    with pytest.raises(CorruptError):
+        decompress_into(forged, bytearray(16))
+    assert validate(forged) is False
+
+
+def test_max_length_is_enforced():
+    value = b"abcd" * 1000
+    compressed = compress(value)
+
+    assert decompress(compressed, max_length=len(value)) == value
+    with pytest.raises(TooLargeError):
+        decompress(compressed, max_length=len(value) - 1)
+    with pytest.raises(TooLargeError):
+        decompress_into(compressed, bytearray(len(value)), max_length=len(value) - 1)
+    assert validate(compressed, max_length=len(value) - 1) is False
+
+
+def test_max_length_is_checked_before_the_block():
+    # the body is garbage, but the header alone is enough to reject it
+    with pytest.raises(TooLargeError):
+        decompress(_header(1 << 20) + b"\xff" * 32, max_length=1 << 10)
+
+
+def test_decompress_many_max_length():
+    small, large = compress(b"x" * 10), compress(b"x" * 1000)
+    results = decompress_many([small, large], max_length=100)
+    assert results[0] == b"x" * 10
+    assert isinstance(results[1], TooLargeError)
+
+    batch = decompress_many([small, large], concatenate=True, max_length=100)
+    assert batch.data == b"x" * 10
+    assert isinstance(batch.errors[1], TooLargeError)
+
+
+@pytest.fixture
+def default_max_length():
+    try:
+        yield
+    finally:
+        set_default_max_length(DEFAULT_MAX_LENGTH)
+
+
+def test_default_max_length_takes_effect(default_max_length):
+    value = b"abcd" * 1000
+    compressed = compress(value)
+    assert get_default_max_length() == DEFAULT_MAX_LENGTH
+
+    set_default_max_length(len(value) - 1)
+    assert get_default_max_length() == len(value) - 1
+    with pytest.raises(TooLargeError):
+        decompress(compressed)
+    with pytest.raises(TooLargeError):
+        decompress_into(compressed, bytearray(len(value)))
+    assert validate(compressed) is False
+    assert isinstance(decompress_many([compressed])[0], TooLargeError)
+    with pytest.raises(TooLargeError):
+        BlockDecoder().feed(compressed)
+    with pytest.raises(TooLargeError):
+        list(iter_tags(compressed))
+    with pytest.raises(TooLargeError):
+        decompress_ssz_snappy(compress_ssz_snappy(value))
+    # An explicit max_length still overrides the default.
+    assert decompress(compressed, max_length=len(value)) == value
+
+    set_default_max_length(len(value))
+    assert decompress(compressed) == value
+    assert validate(compressed) is True
+
+
+def test_default_max_length_leaves_framed_chunks_alone(default_max_length):
+    value = b"abc" * 20000
+    compressor = StreamCompressor()
+    framed = compressor.add_chunk(value) + compressor.flush()
+
+    set_default_max_length(1000)
+    assert StreamDecompressor(max_length=100000).decompress(framed) == value
+    assert StreamDecompressor().decompress(framed) == value
+    with pytest.raises(TooLargeError):
+        StreamDecompressor(max_length=len(value) - 1).decompress(framed)
+    encoded = compress_ssz_snappy(value)
+    assert decompress_ssz_snappy(encoded, max_length=100000) == value
+
+
+@pytest.mark.parametrize("max_length", (-1, DEFAULT_MAX_LENGTH + 1))
+def test_default_max_length_range(max_length, default_max_length):
+    with pytest.raises(ValueError):
+        set_default_max_length(max_length)
+    assert get_default_max_length() == DEFAULT_MAX_LENGTH
@@ -0,0 +1,79 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import os
+
+import pytest
+
+from py_snappy import (
+    CorruptError,
+    StreamCompressor,
+    StreamDecompressor,
+    compress_parallel,
+    decompress_parallel,
+)
+
+
+VALUE = b"".join(bytes([i % 256]) * 3000 + os.urandom(1000) for i in range(300))
+
+
+def serial_compress(value):
+    compressor = StreamCompressor()
+    return compressor.add_chunk(value) + compressor.flush()
+
+
+@pytest.fixture(params=("thread", "process"))
+def executor(request):
+    if request.param == "thread":
+        pool = ThreadPoolExecutor(2)
+    else:
+        pool = ProcessPoolExecutor(2)
+    with pool:
+        yield pool
+
+
+@pytest.mark.parametrize("value", (b"", b"abc", VALUE))
+def test_compress_parallel_matches_serial(executor, value):
+    framed = compress_parallel(value, executor, task_size=65536, max_in_flight=3)
+    assert framed == serial_compress(value)
+    assert StreamDecompressor().decompress(framed) == value
+
+
+@pytest.mark.parametrize("value", (b"", b"abc", VALUE))
+def test_decompress_parallel_matches_serial(executor, value):
+    framed = serial_compress(value)
+    assert decompress_parallel(framed, executor, task_size=100000) == value
+
+
+def pieces(value, size):
+    starts = range(0, len(value), size)
+    return (value[start : start + size] for start in starts)  # noqa: E203
+
+
+@pytest.mark.parametrize("size", (1, 7, 65536, 100000))
+def test_parallel_window_input(executor, size):
+    framed = serial_compress(VALUE)
+    compressed = compress_parallel(pieces(VALUE, size * 3), executor, task_size=131072)
+    assert compressed == framed
+    decompressed = decompress_parallel(pieces(framed, size), executor, task_size=100000)
+    assert decompressed == VALUE
+
+
+def test_parallel_default_process_pool():
+    framed = compress_parallel(VALUE, max_workers=2)
+    assert decompress_parallel(framed, max_workers=2) == VALUE
+
+
+@pytest.mark.parametrize(
+    "framed",
+    (serial_compress(VALUE)[10:], serial_compress(VALUE)[:-1]),
+    ids=("missing-identifier", "truncated"),
+)
+def test_decompress_parallel_corrupt_streams(executor, framed):
+    with pytest.raises(CorruptError):
+        decompress_parallel(framed, executor, task_size=65536)
+    with pytest.raises(CorruptError):
+        decompress_parallel(pieces(framed, 5), executor, task_size=65536)
+
+
+def test_compress_parallel_invalid_task_size():
+    with pytest.raises(ValueError):
+        compress_parallel(VALUE, ThreadPoolExecutor(1), task_size=1000)
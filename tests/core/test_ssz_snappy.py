@@ -0,0 +1,92 @@
+from hypothesis import given, settings, strategies as st
+import pytest
+
+from py_snappy import (
+    CorruptError,
+    SszSnappyCompressor,
+    SszSnappyDecompressor,
+    StreamCompressor,
+    TooLargeError,
+    compress_ssz_snappy,
+    decompress_ssz_snappy,
+)
+from py_snappy.main import putuvarint, uvarint
+
+from tests.core.strategies import random_test_vectors_large_st
+
+
+def _encode_by_hand(value):
+    compressor = StreamCompressor()
+    return putuvarint(len(value)) + compressor.add_chunk(value) + compressor.flush()
+
+
+@given(
+    value=random_test_vectors_large_st,
+    piece_size=st.integers(min_value=1, max_value=100000),
+)
+@settings(max_examples=50)
+def test_ssz_snappy_round_trip(value, piece_size):
+    encoded = compress_ssz_snappy(value)
+    assert encoded == _encode_by_hand(value)
+    assert uvarint(encoded) == (len(value), len(putuvarint(len(value))))
+    assert decompress_ssz_snappy(encoded) == value
+
+    decompressor = SszSnappyDecompressor(max_length=len(value))
+    output = b"".join(
+        decompressor.decompress(encoded[start : start + piece_size])  # noqa: E203
+        for start in range(0, len(encoded), piece_size)
+    )
+    decompressor.flush()
+    assert output == value
+    assert decompressor.length == len(value)
+
+
+def test_ssz_snappy_compressor_in_pieces():
+    value = b"abc" * 100000
+    compressor = SszSnappyCompressor(len(value))
+    encoded = b"".join(
+        compressor.add_chunk(value[start : start + 1000])  # noqa: E203
+        for start in range(0, len(value), 1000)
+    )
+    encoded += compressor.flush()
+    assert decompress_ssz_snappy(encoded) == value
+
+
+def test_ssz_snappy_compressor_enforces_length():
+    compressor = SszSnappyCompressor(10)
+    with pytest.raises(ValueError):
+        compressor.add_chunk(b"x" * 11)
+
+    compressor = SszSnappyCompressor(10)
+    compressor.add_chunk(b"x" * 9)
+    with pytest.raises(ValueError):
+        compressor.flush()
+
+
+def test_ssz_snappy_rejects_declared_length_over_max_length():
+    decompressor = SszSnappyDecompressor(max_length=100)
+    with pytest.raises(TooLargeError):
+        decompressor.decompress(putuvarint(101))
+
+
+def test_ssz_snappy_rejects_stream_longer_than_declared():
+    value = b"x" * 200000
+    framed = _encode_by_hand(value)[len(putuvarint(len(value))) :]  # noqa: E203
+    encoded = putuvarint(1000) + framed
+    decompressor = SszSnappyDecompressor()
+    with pytest.raises(CorruptError):
+        decompressor.decompress(encoded)
+
+
+def test_ssz_snappy_rejects_stream_shorter_than_declared():
+    value = b"x" * 1000
+    framed = _encode_by_hand(value)[len(putuvarint(len(value))) :]  # noqa: E203
+    encoded = putuvarint(1001) + framed
+    with pytest.raises(CorruptError):
+        decompress_ssz_snappy(encoded)
+
+
+@pytest.mark.parametrize("encoded", (b"", b"\x80", b"\xff" * 11))
+def test_ssz_snappy_rejects_invalid_prefix(encoded):
+    with pytest.raises(CorruptError):
+        decompress_ssz_snappy(encoded)
@@ -0,0 +1,110 @@
+from hypothesis import given, settings, strategies as st
+import pytest
+
+from py_snappy import (
+    CompressionStats,
+    CorruptError,
+    TooLargeError,
+    compress,
+    decompress,
+)
+from py_snappy.main import (
+    MAX_COPY4_OFFSET,
+    MAX_LEVEL,
+    MIN_LEVEL,
+    compress as pure_compress,
+)
+
+from tests.core.strategies import random_test_vectors_small_st
+from tests.core.test_official_test_vectors import load_fixture
+
+
+def assert_totals(stats, uncompressed_bytes):
+    assert stats.literal_bytes + stats.copy_bytes == uncompressed_bytes
+    assert sum(stats.match_lengths.values()) == stats.copy_count
+    assert sum(stats.offsets.values()) == stats.copy_count
+    hash_outcomes = stats.hash_hits + stats.hash_collisions
+    hash_outcomes += stats.hash_empty + stats.hash_out_of_window
+    assert hash_outcomes == stats.hash_probes
+
+
+@given(
+    value=random_test_vectors_small_st,
+    level=st.sampled_from(range(MIN_LEVEL, MAX_LEVEL + 1)),
+    max_offset=st.sampled_from((1 << 15, MAX_COPY4_OFFSET)),
+    fragmented=st.booleans(),
+)
+@settings(max_examples=300)
+def test_stats_do_not_change_output(value, level, max_offset, fragmented):
+    stats = CompressionStats()
+    compressed = compress(value, max_offset, level, fragmented, stats=stats)
+    assert compressed == pure_compress(value, max_offset, level, fragmented)
+    assert stats.calls == 1
+    assert stats.uncompressed_bytes == len(value)
+    assert stats.compressed_bytes == len(compressed)
+    assert_totals(stats, len(value))
+
+    decompress_stats = CompressionStats()
+    assert decompress(compressed, stats=decompress_stats) == value
+    for name in (
+        "literal_count",
+        "literal_bytes",
+        "copy1_count",
+        "copy2_count",
+        "copy4_count",
+    ):
+        assert getattr(decompress_stats, name) == getattr(stats, name)
+    assert decompress_stats.match_lengths == stats.match_lengths
+    assert decompress_stats.offsets == stats.offsets
+    assert decompress_stats.hash_probes == 0
+
+
+def test_stats_of_fixture():
+    value = load_fixture("alice29.txt")
+    stats = CompressionStats()
+    compress(value, stats=stats)
+    assert_totals(stats, len(value))
+    assert stats.hash_hits == stats.copy_count
+    assert stats.copy1_count and stats.copy2_count and not stats.copy4_count
+    assert stats.literal_count
+    assert 0 < stats.collision_rate < 1
+    assert set(stats.phase_times) == {"setup", "encode", "output"}
+    assert all(seconds >= 0 for seconds in stats.phase_times.values())
+
+    as_dict = stats.as_dict()
+    assert as_dict["copy_bytes"] == stats.copy_bytes
+    assert sum(as_dict["match_lengths"].values()) == stats.copy_count
+
+
+def test_stats_accumulate():
+    value = load_fixture("alice29.txt")[:10000]
+    once = CompressionStats()
+    compressed = compress(value, stats=once)
+    twice = CompressionStats()
+    compress(value, stats=twice)
+    compress(value, stats=twice)
+    assert twice.calls == 2
+    assert twice.copy_bytes == 2 * once.copy_bytes
+    assert twice.hash_probes == 2 * once.hash_probes
+
+    decompress(compressed, stats=twice)
+    assert twice.calls == 3
+    assert set(twice.phase_times) == {"setup", "encode", "output", "header", "decode"}
+
+
+def test_offset_histogram():
+    value = b"abcdefgh" * 100
+    stats = CompressionStats()
+    decompress(compress(value), stats=stats)
+    # Every copy refers back 8 bytes, an offset of bit length 4.
+    assert set(stats.offsets) == {4}
+    assert stats.literal_bytes == 8
+
+
+def test_decompress_stats_errors():
+    stats = CompressionStats()
+    with pytest.raises(TooLargeError):
+        decompress(compress(b"x" * 100), max_length=99, stats=stats)
+    with pytest.raises(CorruptError):
+        decompress(compress(b"abcdefgh" * 100)[:-1], stats=stats)
+    assert stats.calls == 0
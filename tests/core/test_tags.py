@@ -0,0 +1,119 @@
+from hypothesis import given, settings
+import pytest
+
+from py_snappy import (
+    CorruptError,
+    TooLargeError,
+    compress,
+    decompress,
+    iter_tags,
+    validate,
+)
+from py_snappy.constants import TAG_COPY1, TAG_COPY2, TAG_COPY4, TAG_LITERAL
+from py_snappy.main import putuvarint
+from py_snappy.tags import TAG_NAMES
+from snappy import compress as libsnappy_compress
+
+from tests.core.strategies import (
+    random_test_vectors_large_st,
+    random_test_vectors_small_st,
+)
+
+
+def replay(compressed):
+    """
+    Rebuild the decompressed data from the tags of compressed and the
+    literal bytes they point at.
+    """
+    out = bytearray()
+    for tags in iter_tags(compressed):
+        for kind, position, length, offset in tags:
+            if kind == TAG_LITERAL:
+                header = compressed[position] >> 2
+                start = position + 1 + (header - 59 if header >= 60 else 0)
+                end = start + length
+                out += compressed[start:end]
+            else:
+                for _ in range(length):
+                    out.append(out[-offset])
+    return bytes(out)
+
+
+@given(value=random_test_vectors_large_st)
+@settings(max_examples=200)
+def test_tags_rebuild_value(value):
+    for compressed in (
+        compress(value),
+        compress(value, max_offset=1 << 32),
+        libsnappy_compress(value),
+    ):
+        assert replay(compressed) == value
+
+
+@given(value=random_test_vectors_small_st)
+@settings(max_examples=200)
+def test_tags_batches(value):
+    compressed = compress(value)
+    whole = [tag for tags in iter_tags(compressed) for tag in tags]
+    batches = list(iter_tags(compressed, batch_size=3))
+    assert all(0 < len(tags) <= 3 for tags in batches)
+    assert [tag for tags in batches for tag in tags] == whole
+    if batches:
+        assert batches[0][0] == whole[0]
+
+
+def test_tag_kinds():
+    value = b"0123456789" * 20 + bytes(range(256)) * 300 + b"0123456789" * 20
+    compressed = compress(value, max_offset=1 << 32)
+    kinds = set()
+    for tags in iter_tags(compressed):
+        assert tags.kinds.typecode == "B"
+        kinds.update(tags.kinds)
+        for kind, position, _, offset in tags:
+            assert compressed[position] & 0x03 == kind
+            assert (offset == 0) == (kind == TAG_LITERAL)
+    assert kinds == {TAG_LITERAL, TAG_COPY1, TAG_COPY2, TAG_COPY4}
+    assert TAG_NAMES[TAG_COPY4] == "COPY_4"
+
+
+def test_empty_block():
+    assert list(iter_tags(compress(b""))) == []
+
+
+@given(value=random_test_vectors_small_st)
+@settings(max_examples=300)
+def test_tags_raise_like_decompress(value):
+    compressed = compress(value)
+    for end in range(len(compressed)):
+        truncated = compressed[:end]
+        try:
+            decompress(truncated)
+        except (CorruptError, TooLargeError) as err:
+            with pytest.raises(type(err)):
+                for _ in iter_tags(truncated):
+                    pass
+            assert validate(truncated) is False
+        else:
+            list(iter_tags(truncated))
+            assert validate(truncated) is True
+
+
+def test_tags_max_length():
+    with pytest.raises(TooLargeError):
+        list(iter_tags(compress(b"x" * 100), max_length=99))
+
+
+def test_tags_reject_bad_offsets():
+    # A copy at the start of the block has nothing to copy from.
+    block = putuvarint(4) + bytes([TAG_COPY2 | (3 << 2), 1, 0])
+    with pytest.raises(CorruptError):
+        list(iter_tags(block))
+    block = putuvarint(8) + bytes([TAG_LITERAL | (3 << 2)]) + b"abcd"
+    block += bytes([TAG_COPY1, 5])
+    with pytest.raises(CorruptError):
+        list(iter_tags(block))
+
+
+def test_batch_size_must_be_positive():
+    with pytest.raises(ValueError):
+        list(iter_tags(compress(b"abc"), batch_size=0))